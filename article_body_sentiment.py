@@ -0,0 +1,190 @@
+import os
+import re
+import sys
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+import torch
+
+from sentiment_analyzer_correct import CorrectSentimentAnalyzer, summarize_scores
+
+# 取得・解析に失敗した記事の本文
+FAILED_CONTENT = {"取得失敗", "解析失敗"}
+
+def split_sentences(text) -> List[str]:
+    """本文を文（句点「。」と改行）で分割"""
+    if pd.isna(text) or str(text).strip() in FAILED_CONTENT:
+        return []
+    sentences = re.split(r'[。\n]', str(text))
+    return [s.strip() for s in sentences if s.strip()]
+
+def make_windows(ids: List[int], window_size: int, overlap: int) -> List[List[int]]:
+    """長いトークン列を重なりのあるウィンドウに分割（最後のウィンドウは末尾に揃える）"""
+    if len(ids) <= window_size:
+        return [ids]
+    step = window_size - overlap
+    starts = list(range(0, len(ids) - window_size, step)) + [len(ids) - window_size]
+    return [ids[start:start + window_size] for start in starts]
+
+class ArticleBodySentimentScorer:
+    def __init__(self, analyzer: CorrectSentimentAnalyzer, batch_size: int = 32,
+                 max_length: int = 512, overlap: int = 128):
+        """記事本文を文単位でスコアリングし、記事単位・日付単位の特徴量に集計する
+
+        Args:
+            analyzer (CorrectSentimentAnalyzer): 読み込み済みの分析器
+            batch_size (int): 1回の順伝播に詰めるウィンドウ数
+            max_length (int): モデルの最大トークン長（[CLS]/[SEP]を含む）
+            overlap (int): 512トークンを超える文のウィンドウ間の重なり（トークン数）
+        """
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+        self.window_size = max_length - 2
+        self.overlap = overlap
+
+    def score_sentences(self, sentences: List[str]) -> np.ndarray:
+        """文ごとの感情スコア（Pos - Neg）を計算（長い文はウィンドウの平均）"""
+        if not sentences:
+            return np.zeros(0)
+
+        tokenizer = self.analyzer.tokenizer
+        token_ids = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+
+        # すべての文をウィンドウに展開し、どの文に属するかを記録
+        windows = []
+        owners = []
+        for sentence_index, ids in enumerate(token_ids):
+            for window in make_windows(ids, self.window_size, self.overlap):
+                windows.append([tokenizer.cls_token_id] + window + [tokenizer.sep_token_id])
+                owners.append(sentence_index)
+
+        # 長さ順に並べてバッチに詰め、パディングを減らす
+        order = np.argsort([len(w) for w in windows], kind="stable")
+        window_scores = np.zeros(len(windows))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            max_len = max(len(windows[i]) for i in indices)
+            input_ids = torch.full((len(indices), max_len), tokenizer.pad_token_id, dtype=torch.long)
+            attention_mask = torch.zeros((len(indices), max_len), dtype=torch.long)
+            for row, i in enumerate(indices):
+                input_ids[row, :len(windows[i])] = torch.tensor(windows[i])
+                attention_mask[row, :len(windows[i])] = 1
+
+            logits = self.analyzer.compute_logits({
+                'input_ids': input_ids,
+                'attention_mask': attention_mask,
+                'token_type_ids': torch.zeros_like(input_ids),
+            })
+            prob = torch.softmax(logits, dim=1)
+            window_scores[indices] = (prob[:, 2] - prob[:, 1]).numpy()
+
+        # ウィンドウのスコアを文ごとに平均
+        owners = np.array(owners)
+        totals = np.bincount(owners, weights=window_scores, minlength=len(sentences))
+        counts = np.bincount(owners, minlength=len(sentences))
+        return totals / counts
+
+    def score_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """記事のチャンクをまとめてスコアリングし、記事ごとの特徴量を返す"""
+        article_sentences = [split_sentences(content) for content in chunk['content']]
+        flat = [s for sentences in article_sentences for s in sentences]
+        scores = self.score_sentences(flat)
+
+        features = []
+        position = 0
+        for sentences in article_sentences:
+            summary = summarize_scores(scores[position:position + len(sentences)])
+            position += len(sentences)
+            features.append({
+                'body_sentiment_score': summary['avg_sentiment_score'],
+                'body_positive_count': summary['positive_count'],
+                'body_negative_count': summary['negative_count'],
+                'body_neutral_count': summary['neutral_count'],
+                'total_sentences': summary['total_titles'],
+            })
+
+        result = chunk[['date', 'bloomberg_url', 'title']].reset_index(drop=True)
+        return pd.concat([result, pd.DataFrame(features)], axis=1)
+
+def process_articles_csv(scorer: ArticleBodySentimentScorer, articles_csv: str,
+                         article_output_csv: str, date_output_csv: str,
+                         chunk_size: int = 200) -> pd.DataFrame:
+    """記事CSVをチャンク単位で読みながら本文をスコアリング（メモリ使用量はチャンクサイズで決まる）"""
+    print(f"記事データを読み込み中: {articles_csv}（{chunk_size} 件ずつ）")
+
+    if os.path.exists(article_output_csv):
+        os.remove(article_output_csv)
+
+    date_totals = {}
+    processed = 0
+    for chunk in pd.read_csv(articles_csv, chunksize=chunk_size):
+        features = scorer.score_chunk(chunk)
+        features.to_csv(
+            article_output_csv, mode='a', index=False, encoding='utf-8-sig',
+            header=(processed == 0)
+        )
+        processed += len(chunk)
+        print(f"  処理済み: {processed} 件")
+
+        # 日付ごとの集計値は合計だけを保持する
+        scored = features[features['total_sentences'] > 0]
+        for date, group in scored.groupby('date'):
+            totals = date_totals.setdefault(date, np.zeros(6))
+            totals += [
+                group['body_sentiment_score'].sum(),
+                len(group),
+                group['body_positive_count'].sum(),
+                group['body_negative_count'].sum(),
+                group['body_neutral_count'].sum(),
+                group['total_sentences'].sum(),
+            ]
+
+    rows = []
+    for date in sorted(date_totals):
+        score_sum, articles, positive, negative, neutral, sentences = date_totals[date]
+        rows.append({
+            'date': date,
+            'body_sentiment_score': score_sum / articles,
+            'body_positive_count': int(positive),
+            'body_negative_count': int(negative),
+            'body_neutral_count': int(neutral),
+            'total_sentences': int(sentences),
+            'total_articles': int(articles),
+        })
+    date_df = pd.DataFrame(rows)
+    date_df.to_csv(date_output_csv, index=False, encoding='utf-8-sig')
+
+    print(f"記事ごとの結果を保存しました: {article_output_csv}")
+    print(f"日付ごとの結果を保存しました: {date_output_csv}")
+    return date_df
+
+def main():
+    """メイン関数"""
+    articles_csv = "bloomberg_articles.csv"
+    article_output_csv = "article_body_sentiment.csv"
+    date_output_csv = "article_body_sentiment_by_date.csv"
+
+    print("=== 記事本文のセンチメント分析ツール ===")
+    print(f"入力ファイル: {articles_csv}")
+    print(f"記事ごとの出力: {article_output_csv}")
+    print(f"日付ごとの出力: {date_output_csv}")
+
+    try:
+        analyzer = CorrectSentimentAnalyzer()
+        scorer = ArticleBodySentimentScorer(analyzer)
+        date_df = process_articles_csv(scorer, articles_csv, article_output_csv, date_output_csv)
+
+        print(f"\n=== 処理完了 ===")
+        print(f"日付数: {len(date_df)}")
+        if len(date_df) > 0:
+            print(f"本文センチメントスコアの平均: {date_df['body_sentiment_score'].mean():.4f}")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+import sys
+import unicodedata
+from collections import deque
+from typing import List, Dict, Set
+
+import pandas as pd
+
+# 資産ごとの関連キーワード（data.csv の asset 列に対応）
+ASSET_KEYWORDS = {
+    'NKY Index': ["日経", "株", "東証", "TOPIX", "日本株", "日銀"],
+    'SPX Index': ["米国株", "米株", "S&P", "ダウ", "ナスダック", "ウォール街", "NY株"],
+    'USDJPY Curncy': ["ドル円", "ドル・円", "為替", "円相場", "円安", "円高", "ドル高", "ドル安", "為替介入"],
+    'USGG10YR Index': ["米国債", "米債", "利回り", "米金利", "FRB", "FOMC", "利上げ", "利下げ", "パウエル", "インフレ"],
+}
+
+def normalize_for_matching(text) -> str:
+    """全角英数字を半角に揃え（NFKC）、英字を小文字にする"""
+    return unicodedata.normalize("NFKC", str(text)).lower()
+
+class AhoCorasick:
+    def __init__(self, patterns: Dict[str, Set[str]]):
+        """複数パターンを1回の走査で照合するAho-Corasickオートマトン
+
+        Args:
+            patterns (dict): パターン文字列 → そのパターンに対応するラベルの集合
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+
+        # トライ木を構築
+        for pattern, labels in patterns.items():
+            node = 0
+            for char in pattern:
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.output[node] |= set(labels)
+
+        # 幅優先で失敗遷移を設定し、出力を失敗先から引き継ぐ
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                if node:
+                    state = self.fail[node]
+                    while state and char not in self.goto[state]:
+                        state = self.fail[state]
+                    self.fail[child] = self.goto[state].get(char, 0)
+                self.output[child] |= self.output[self.fail[child]]
+
+    def find_labels(self, text: str) -> Set[str]:
+        """テキスト中に現れたパターンのラベルをすべて返す（テキスト長に線形）"""
+        labels = set()
+        node = 0
+        for char in text:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            if self.output[node]:
+                labels |= self.output[node]
+        return labels
+
+class AssetRouter:
+    def __init__(self, asset_keywords: Dict[str, List[str]] = None):
+        """資産ごとのキーワードから記事の関連資産を判定するルーター"""
+        self.asset_keywords = asset_keywords or ASSET_KEYWORDS
+        patterns = {}
+        for asset, keywords in self.asset_keywords.items():
+            for keyword in keywords:
+                patterns.setdefault(normalize_for_matching(keyword), set()).add(asset)
+        self.automaton = AhoCorasick(patterns)
+
+    def tag(self, text) -> List[str]:
+        """テキストに関連する資産を返す（資産の定義順）"""
+        if pd.isna(text):
+            return []
+        labels = self.automaton.find_labels(normalize_for_matching(text))
+        return [asset for asset in self.asset_keywords if asset in labels]
+
+    def tag_articles(self, articles_df: pd.DataFrame, columns: List[str] = None) -> pd.DataFrame:
+        """記事ごとに関連資産を判定し、'assets' 列（; 区切り）を追加"""
+        columns = columns or ['title']
+        texts = articles_df[columns].fillna('').astype(str).agg(' '.join, axis=1)
+        tagged = articles_df.copy()
+        tagged['assets'] = [';'.join(self.tag(text)) for text in texts]
+        return tagged
+
+def add_asset_titles_to_original_csv(router: AssetRouter, original_csv_path: str,
+                                     articles_csv_path: str, output_csv_path: str) -> pd.DataFrame:
+    """add_titles_to_original_csv の資産別版: 各行にはその資産に関連する記事のタイトルだけを付与"""
+    print("=== 資産ごとに関連ニュースタイトルを補完します ===")
+    original_df = pd.read_csv(original_csv_path)
+    articles_df = pd.read_csv(articles_csv_path)
+    print(f"元のCSV: {len(original_df)} 行 / 記事データ: {len(articles_df)} 行")
+
+    tagged = router.tag_articles(articles_df)
+
+    # (資産, 日付) → タイトルのリスト
+    asset_date_titles = {}
+    for date, title, assets in zip(tagged['date'], tagged['title'], tagged['assets']):
+        for asset in filter(None, assets.split(';')):
+            asset_date_titles.setdefault((asset, date), []).append(title)
+
+    original_df['news_titles'] = [
+        ' | '.join(asset_date_titles.get((asset, date), []))
+        for asset, date in zip(original_df['asset'], original_df['date'])
+    ]
+    original_df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+    print(f"補完完了: {output_csv_path}")
+
+    # 全記事を全資産に付与する場合と比べた推論対象の削減量
+    date_counts = articles_df.groupby('date').size()
+    all_titles = int(original_df['date'].map(date_counts).fillna(0).sum())
+    routed_titles = int(original_df['news_titles'].map(lambda v: len(v.split(' | ')) if v else 0).sum())
+    print(f"付与したタイトル数: {routed_titles}（全記事を付与した場合: {all_titles}）")
+    for asset in router.asset_keywords:
+        share = (tagged['assets'].str.contains(asset, regex=False)).mean() * 100
+        print(f"  {asset}: 記事の {share:.1f}% が関連")
+    return original_df
+
+def score_asset_titles(analyzer, df: pd.DataFrame, batch_size: int = 32) -> pd.DataFrame:
+    """振り分け済みのタイトルだけを1回ずつスコアリングし、資産・日付ごとに集計"""
+    from sentiment_analyzer_correct import split_news_titles, summarize_scores
+    row_titles = [split_news_titles(v) for v in df['news_titles']]
+    titles = list(dict.fromkeys(t for ts in row_titles for t in ts))
+    print(f"スコアリング対象のユニークなタイトル数: {len(titles)}")
+
+    scores = {}
+    if titles:
+        probs = analyzer.predict_probabilities(titles, batch_size=batch_size)
+        scores = dict(zip(titles, (probs[:, 2] - probs[:, 1]).tolist()))
+
+    summaries = pd.DataFrame([summarize_scores([scores[t] for t in ts]) for ts in row_titles], index=df.index)
+    return pd.concat([df, summaries], axis=1)
+
+def main():
+    """メイン関数"""
+    original_csv = "data.csv"
+    articles_csv = "bloomberg_articles.csv"
+    output_csv = "data_with_asset_news_titles.csv"
+    scores_csv = "data_with_asset_sentiment_scores.csv"
+
+    print("=== キーワードによる資産別ニュース振り分けツール ===")
+    print(f"元のCSV: {original_csv}")
+    print(f"記事データ: {articles_csv}")
+    print(f"出力ファイル: {output_csv}")
+
+    try:
+        router = AssetRouter()
+        df = add_asset_titles_to_original_csv(router, original_csv, articles_csv, output_csv)
+
+        from sentiment_analyzer_correct import CorrectSentimentAnalyzer
+        analyzer = CorrectSentimentAnalyzer(use_server=True)
+        result_df = score_asset_titles(analyzer, df)
+        result_df.to_csv(scores_csv, index=False, encoding='utf-8-sig')
+        print(f"資産別の感情スコアを保存しました: {scores_csv}")
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
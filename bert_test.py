@@ -1,20 +1,23 @@
+import numpy as np
 import pandas as pd
-import torch
-from transformers import (
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
-    BertJapaneseTokenizer,
-)
 import sys
 import re
 from typing import List, Dict, Any
 
 class SentimentAnalyzer:
-    def __init__(self):
-        """BERTモデルを初期化"""
+    def __init__(self, use_server: bool = False):
+        """BERTモデルを初期化（use_server=True なら起動中の常駐スコアリングサービスを優先）"""
+        self.client = None
+        if use_server:
+            from sentiment_server import connect_if_running
+            self.client = connect_if_running()
+            if self.client is not None:
+                return
+        
         print("BERTモデルを読み込み中...")
         try:
-            # BERTを用いた日本語の感情分析モデルをロード
+            # BERTを用いた日本語の感情分析モデルをロード（常駐サービス利用時は transformers を読み込まない）
+            from transformers import AutoModelForSequenceClassification, BertJapaneseTokenizer
             self.tokenizer = BertJapaneseTokenizer.from_pretrained(
                 "cl-tohoku/bert-base-japanese-whole-word-masking"
             )
@@ -45,19 +48,23 @@ class SentimentAnalyzer:
             return 0.0
         
         try:
-            # テキストをトークン化
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=512
-            )
-            
-            # モデルで予測
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+            if self.client is not None:
+                predictions = np.asarray(self.client.predict_probabilities([text]))
+            else:
+                import torch
+                # テキストをトークン化
+                inputs = self.tokenizer(
+                    text,
+                    return_tensors="pt",
+                    truncation=True,
+                    padding=True,
+                    max_length=512
+                )
+                
+                # モデルで予測
+                with torch.no_grad():
+                    outputs = self.model(**inputs)
+                    predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
             
             # 感情スコアの計算（ネガティブ: 0, ポジティブ: 1）
             # ポジティブの確率からネガティブの確率を引いて-1～1の範囲に正規化
@@ -77,8 +84,8 @@ def test_bert_analysis():
     """BERTの感情分析をテストする"""
     print("=== BERT感情分析テスト ===")
     
-    # 感情分析器を初期化
-    analyzer = SentimentAnalyzer()
+    # 感情分析器を初期化（常駐サービスが起動していれば利用）
+    analyzer = SentimentAnalyzer(use_server=True)
     
     # テスト用の日本語テキスト
     test_texts = [
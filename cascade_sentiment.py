@@ -0,0 +1,200 @@
+import sys
+import time
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import pearsonr
+
+from sentiment_analyzer_correct import split_news_titles, summarize_scores
+
+# bert_test_alternative.py の simple_sentiment_analysis の単語リストを市況向けに拡張
+POSITIVE_WORDS = [
+    "良い", "素晴らしい", "成功", "上昇", "増加", "利益", "成長", "改善",
+    "復帰", "堅調", "上回る", "急増", "最高値", "好調", "順調",
+    "反発", "続伸", "高値", "増益", "黒字", "回復", "上方修正", "最高益", "買い", "拡大",
+]
+NEGATIVE_WORDS = [
+    "悪い", "最悪", "失敗", "下落", "減少", "損失", "衰退", "悪化",
+    "退社", "リセッション", "遮断", "不安", "警告", "反対", "格下げ",
+    "急落", "続落", "安値", "減益", "赤字", "下方修正", "懸念", "売り", "縮小", "危機", "破綻",
+]
+# 直後に来ると極性を反転させる語（例: 「回復せず」「上昇ならず」）
+NEGATION_SUFFIXES = ["せず", "ならず", "できず", "しない", "見送り"]
+# 辞書の語を含むが極性を持たない語（この中に現れた出現は数えない）
+EXCLUDED_TERMS = {
+    "売り": ["小売り", "売り上げ", "売り出し", "円売り", "ドル売り"],
+    "買い": ["円買い", "ドル買い", "買い物"],
+}
+
+# analyze_news_titles の分類しきい値（|スコア| > 0.1 でポジティブ / ネガティブ）
+DECISION_THRESHOLD = 0.1
+
+class LexiconScorer:
+    def __init__(self, positive_words: List[str] = None, negative_words: List[str] = None,
+                 excluded_terms: Dict[str, List[str]] = None):
+        """辞書ベースの高速な感情スコアラー
+
+        重なり合う語は長い語を優先して1回だけ数える（「最高値」の中の「高値」は数えない）。
+        """
+        self.positive_words = positive_words or POSITIVE_WORDS
+        self.negative_words = negative_words or NEGATIVE_WORDS
+        self.excluded_terms = EXCLUDED_TERMS if excluded_terms is None else excluded_terms
+        polarity = {word: 1 for word in self.positive_words}
+        polarity.update({word: -1 for word in self.negative_words})
+        # 長い語から順に照合する
+        self.words = sorted(polarity.items(), key=lambda item: -len(item[0]))
+
+    @staticmethod
+    def _spans(text: str, word: str) -> List[Tuple[int, int]]:
+        """text 中の word の出現位置 (開始, 終了)"""
+        spans = []
+        start = text.find(word)
+        while start != -1:
+            spans.append((start, start + len(word)))
+            start = text.find(word, start + 1)
+        return spans
+
+    def matches(self, text: str) -> List[Tuple[str, int]]:
+        """(語, 否定を反映した極性) の一覧。除外語の中や、より長い語と重なる出現は数えない"""
+        used = np.zeros(len(text), dtype=bool)
+        found = []
+        for word, polarity in self.words:
+            blocked = np.zeros(len(text), dtype=bool)
+            for term in self.excluded_terms.get(word, []):
+                for start, end in self._spans(text, term):
+                    blocked[start:end] = True
+            for start, end in self._spans(text, word):
+                if used[start:end].any() or blocked[start:end].any():
+                    continue
+                used[start:end] = True
+                following = text[end:end + 3]
+                negated = any(following.startswith(suffix) for suffix in NEGATION_SUFFIXES)
+                found.append((word, -polarity if negated else polarity))
+        return found
+
+    def score(self, text: str) -> Tuple[float, int]:
+        """(スコア, ヒット数) を返す。スコアは (pos - neg) / (pos + neg + 1) で -1～1"""
+        polarities = [polarity for _, polarity in self.matches(text)]
+        positive = sum(1 for p in polarities if p > 0)
+        negative = len(polarities) - positive
+        hits = positive + negative
+        return (positive - negative) / (hits + 1), hits
+
+class CascadeSentimentAnalyzer:
+    def __init__(self, analyzer=None, lexicon: LexiconScorer = None,
+                 decision_margin: float = 0.3, batch_size: int = 32):
+        """辞書スコアラーを先に適用し、分類しきい値（±0.1）付近のタイトルだけBERTに送るカスケード
+
+        辞書に一語もヒットしないタイトルは中立（0.0）とし、BERTには送らない。
+        辞書で判定したタイトルは辞書スコアをそのまま使う（ヒット数が多いほど絶対値が大きい）。
+
+        Args:
+            analyzer: BERTの分析器（Noneの場合は必要になった時点で CorrectSentimentAnalyzer を読み込む）
+            lexicon (LexiconScorer): 辞書スコアラー
+            decision_margin (float): 辞書スコアの絶対値と DECISION_THRESHOLD の差がこれ未満ならBERTに送る
+            batch_size (int): BERTのバッチサイズ
+        """
+        self.analyzer = analyzer
+        self.lexicon = lexicon or LexiconScorer()
+        self.decision_margin = decision_margin
+        self.batch_size = batch_size
+
+    def load_bert(self):
+        """BERTの分析器を返す（未読み込みならここで読み込む）"""
+        if self.analyzer is None:
+            from sentiment_analyzer_correct import CorrectSentimentAnalyzer
+            self.analyzer = CorrectSentimentAnalyzer(use_server=True)
+        return self.analyzer
+
+    def route(self, titles: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """辞書スコアと、BERTに送るかどうかのマスクを返す"""
+        scored = [self.lexicon.score(t) for t in titles]
+        scores = np.array([s for s, _ in scored], dtype=float)
+        hits = np.array([h for _, h in scored], dtype=int)
+
+        # ヒットがあり、スコアが分類しきい値の近く（打ち消し合い・弱い判定）のタイトルだけBERTに送る
+        uncertain = (hits > 0) & (np.abs(np.abs(scores) - DECISION_THRESHOLD) < self.decision_margin)
+        return np.where(hits > 0, scores, 0.0), uncertain
+
+    def get_sentiment_scores(self, titles: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(タイトルごとのスコア, BERTに送ったかのマスク) を返す"""
+        scores, routed = self.route(titles)
+        if routed.any():
+            routed_titles = [t for t, r in zip(titles, routed) if r]
+            probs = self.load_bert().predict_probabilities(routed_titles, batch_size=self.batch_size)
+            scores[routed] = np.asarray(probs[:, 2] - probs[:, 1])
+        return scores, routed
+
+    def analyze_news_titles(self, news_titles: str) -> Dict[str, Any]:
+        """CorrectSentimentAnalyzer.analyze_news_titles と同じ集計値を返す"""
+        titles = split_news_titles(news_titles)
+        scores, _ = self.get_sentiment_scores(titles)
+        return summarize_scores(scores)
+
+def evaluate_cascade(cascade: CascadeSentimentAnalyzer, input_file: str) -> Dict[str, Any]:
+    """全件BERTと比較して、BERTに送った割合とスコアのずれを計測"""
+    df = pd.read_csv(input_file)
+    row_titles = [split_news_titles(v) for v in df['news_titles']]
+    titles = list(dict.fromkeys(t for ts in row_titles for t in ts))
+
+    # モデルの読み込み時間を計測に含めない
+    cascade.load_bert()
+
+    start = time.perf_counter()
+    cascade_scores, routed = cascade.get_sentiment_scores(titles)
+    cascade_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    probs = cascade.load_bert().predict_probabilities(titles, batch_size=cascade.batch_size)
+    bert_time = time.perf_counter() - start
+    bert_scores = np.asarray(probs[:, 2] - probs[:, 1])
+
+    # 行ごとの avg_sentiment_score のずれ
+    index = {t: i for i, t in enumerate(titles)}
+    cascade_avg = np.array([np.mean([cascade_scores[index[t]] for t in ts]) if ts else 0.0 for ts in row_titles])
+    bert_avg = np.array([np.mean([bert_scores[index[t]] for t in ts]) if ts else 0.0 for ts in row_titles])
+
+    def classify(scores):
+        return np.where(scores > 0.1, 1, np.where(scores < -0.1, -1, 0))
+
+    return {
+        'titles': len(titles),
+        'routed_fraction': float(routed.mean()) if len(titles) else 0.0,
+        'title_mean_abs_drift': float(np.mean(np.abs(cascade_scores - bert_scores))),
+        'title_label_agreement': float(np.mean(classify(cascade_scores) == classify(bert_scores))),
+        'row_mean_abs_drift': float(np.mean(np.abs(cascade_avg - bert_avg))),
+        'row_corr': float(pearsonr(cascade_avg, bert_avg)[0]) if len(df) > 2 else float('nan'),
+        'cascade_seconds': cascade_time,
+        'bert_seconds': bert_time,
+    }
+
+def main():
+    """メイン関数: カスケードと全件BERTを比較"""
+    input_file = "data_with_news_titles.csv"
+
+    print("=== 辞書 → BERT カスケード感情分析 ===")
+    print(f"入力ファイル: {input_file}")
+
+    try:
+        cascade = CascadeSentimentAnalyzer()
+        print(f"BERTに送る範囲: 辞書スコアの絶対値が {DECISION_THRESHOLD} ± {cascade.decision_margin}（ヒットなしは中立）")
+        result = evaluate_cascade(cascade, input_file)
+
+        print(f"\n=== 評価結果 ===")
+        print(f"ユニークなタイトル数: {result['titles']}")
+        print(f"BERTに送った割合: {result['routed_fraction'] * 100:.1f}%")
+        print(f"タイトル単位の平均絶対誤差: {result['title_mean_abs_drift']:.4f}")
+        print(f"タイトル単位の分類一致率: {result['title_label_agreement'] * 100:.1f}%")
+        print(f"行単位 avg_sentiment_score の平均絶対誤差: {result['row_mean_abs_drift']:.4f}")
+        print(f"行単位 avg_sentiment_score の相関: {result['row_corr']:.4f}")
+        print(f"処理時間: カスケード {result['cascade_seconds']:.2f} 秒 / 全件BERT {result['bert_seconds']:.2f} 秒")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
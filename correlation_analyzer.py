@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -5,14 +6,180 @@ import numpy as np
 from scipy import stats
 from scipy.stats import pearsonr, spearmanr
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from jump_detector import PRICES_CSV, compute_rolling_statistics
 warnings.filterwarnings('ignore')
 
+# 多資産・多指標の相関分析で使う列
+SENTIMENT_FEATURES = ['avg_sentiment_score', 'positive_count', 'negative_count']
+MARKET_TARGETS = ['ret', 'jump_width', 'duration']
+# リード・ラグ相関を出力する有効な組の最小数
+MIN_LEAD_LAG_OVERLAP = 20
+
+def stack_groups(df, group_column, columns):
+    """グループごとの行を (グループ数, 最大行数, 列数) の配列に詰める（足りない行は NaN）"""
+    groups = list(pd.unique(df[group_column]))
+    position = df.groupby(group_column, sort=False).cumcount().to_numpy()
+    group_index = pd.Categorical(df[group_column], categories=groups).codes
+    max_rows = int(position.max()) + 1 if len(df) else 0
+
+    values = np.full((len(groups), max_rows, len(columns)), np.nan)
+    values[group_index, position] = df[columns].to_numpy(dtype=float)
+    return groups, values
+
+def batched_pearson(x, y, mask):
+    """マスク付きのピアソン相関をまとめて計算
+
+    Args:
+        x: (G, n, F) の配列
+        y: (G, n, T) の配列
+        mask: (G, n) の有効行マスク
+    Returns:
+        (G, F, T) の相関係数と (G,) の有効行数
+    """
+    w = mask.astype(float)
+    n = w.sum(axis=1)
+    safe_n = np.where(n > 0, n, 1)[:, None]
+    x = np.where(mask[..., None], x, 0.0)
+    y = np.where(mask[..., None], y, 0.0)
+    xc = (x - (x.sum(axis=1) / safe_n)[:, None, :]) * w[..., None]
+    yc = (y - (y.sum(axis=1) / safe_n)[:, None, :]) * w[..., None]
+    cov = np.einsum('gnf,gnt->gft', xc, yc)
+    x_ss = np.einsum('gnf,gnf->gf', xc, xc)
+    y_ss = np.einsum('gnt,gnt->gt', yc, yc)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = cov / np.sqrt(x_ss[:, :, None] * y_ss[:, None, :])
+    return np.clip(r, -1.0, 1.0), n
+
+def correlation_p_values(r, n):
+    """相関係数の t 検定による両側p値（pearsonr / spearmanr と同じ近似、n は r にブロードキャスト可能な形）"""
+    df = np.broadcast_to(np.asarray(n, dtype=float) - 2, r.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = r * np.sqrt(df / np.clip(1.0 - r ** 2, 1e-300, None))
+        p = 2 * stats.t.sf(np.abs(t), df)
+    return np.where(df > 0, p, np.nan)
+
+def masked_cross_correlation(x, y, max_lag):
+    """欠損（NaN）をマスクした正規化相互相関をFFTで一括計算
+
+    ラグ k の値は x[t] と y[t + k] の相関（両方が有効な t のみ）。k > 0 は x が y に先行することを表す。
+
+    Args:
+        x: (系列数, 日数) の配列
+        y: (系列数, 日数) の配列
+        max_lag (int): 計算する最大ラグ（-max_lag ～ max_lag）
+
+    Returns:
+        (ラグの配列, (系列数, ラグ数) の相関, (系列数, ラグ数) の有効な組の数)
+    """
+    length = x.shape[1]
+    max_lag = min(max_lag, length - 1)
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    x, y = np.where(mx, x, 0.0), np.where(my, y, 0.0)
+    mx, my = mx.astype(float), my.astype(float)
+    nfft = 1 << int(np.ceil(np.log2(2 * length - 1)))
+
+    def correlate(a, b):
+        # c[k] = Σ_t a[t] b[t + k]（負のラグは末尾に折り返される）
+        c = np.fft.irfft(np.conj(np.fft.rfft(a, nfft)) * np.fft.rfft(b, nfft), nfft)
+        return np.concatenate([c[:, nfft - max_lag:], c[:, :max_lag + 1]], axis=1)
+
+    n = np.rint(correlate(mx, my))
+    sum_x = correlate(x, my)
+    sum_y = correlate(mx, y)
+    sum_xx = correlate(x * x, my)
+    sum_yy = correlate(mx, y * y)
+    sum_xy = correlate(x, y)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = sum_yy - sum_y ** 2 / n
+        r = cov / np.sqrt(var_x * var_y)
+    # FFTの丸め誤差で分散がわずかに負・ゼロ近傍になる組は無効とする
+    r = np.where((n >= 3) & (var_x > 1e-12) & (var_y > 1e-12), np.clip(r, -1.0, 1.0), np.nan)
+    return np.arange(-max_lag, max_lag + 1), r, n.astype(int)
+
+def rowwise_pearson(x, y):
+    """(リサンプル数, n) の行列の行ごとのピアソン相関"""
+    xc = x - x.mean(axis=1, keepdims=True)
+    yc = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (xc * yc).sum(axis=1) / np.sqrt((xc * xc).sum(axis=1) * (yc * yc).sum(axis=1))
+
+def _resample_chunk(args):
+    """ブートストラップ・並べ替えのリサンプルを1チャンク分まとめて計算（プロセスプールから呼ばれる）"""
+    x, y, n_resamples, seed_sequence = args
+    rng = np.random.default_rng(seed_sequence)
+    n = len(x)
+
+    # ブートストラップ: 行の組を復元抽出（インデックス行列で一括）
+    index = rng.integers(0, n, size=(n_resamples, n))
+    bx, by = x[index], y[index]
+    boot_pearson = rowwise_pearson(bx, by)
+    boot_spearman = rowwise_pearson(stats.rankdata(bx, axis=1), stats.rankdata(by, axis=1))
+
+    # 並べ替え: y の順序だけをシャッフル（帰無仮説: 無相関）
+    permutation = rng.permuted(np.broadcast_to(np.arange(n), (n_resamples, n)), axis=1)
+    perm_pearson = rowwise_pearson(np.broadcast_to(x, (n_resamples, n)), y[permutation])
+    x_rank, y_rank = stats.rankdata(x), stats.rankdata(y)
+    perm_spearman = rowwise_pearson(np.broadcast_to(x_rank, (n_resamples, n)), y_rank[permutation])
+
+    return boot_pearson, boot_spearman, perm_pearson, perm_spearman
+
+def resampling_test(x, y, n_resamples=20000, chunk_size=2000, seed=0, max_workers=None, confidence=0.95):
+    """ブートストラップ信頼区間と並べ替えp値（ピアソン・スピアマン）
+
+    Args:
+        x, y: 1次元の配列
+        n_resamples (int): リサンプル回数
+        chunk_size (int): 1チャンクあたりのリサンプル回数（プロセスに分配する単位）
+        seed (int): 乱数シード（チャンクごとに SeedSequence から独立な系列を生成）
+        max_workers (int): プロセス数（None の場合はCPU数）
+        confidence (float): 信頼区間の水準
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    chunks = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_resample_chunk, [(x, y, size, seq) for size, seq in zip(chunks, seeds)]))
+    boot_pearson, boot_spearman, perm_pearson, perm_spearman = (np.concatenate(parts) for parts in zip(*results))
+
+    observed_pearson = rowwise_pearson(x[None, :], y[None, :])[0]
+    observed_spearman = rowwise_pearson(stats.rankdata(x)[None, :], stats.rankdata(y)[None, :])[0]
+    alpha = (1 - confidence) / 2 * 100
+
+    def permutation_p(null, observed):
+        # 両側。観測値自体を1回分として数える（p が 0 にならない）
+        return (np.sum(np.abs(null) >= abs(observed) - 1e-12) + 1) / (len(null) + 1)
+
+    return {
+        'pearson_ci_low': np.nanpercentile(boot_pearson, alpha),
+        'pearson_ci_high': np.nanpercentile(boot_pearson, 100 - alpha),
+        'pearson_perm_p': permutation_p(perm_pearson, observed_pearson),
+        'spearman_ci_low': np.nanpercentile(boot_spearman, alpha),
+        'spearman_ci_high': np.nanpercentile(boot_spearman, 100 - alpha),
+        'spearman_perm_p': permutation_p(perm_spearman, observed_spearman),
+        'n_resamples': n_resamples,
+    }
+
 # 日本語フォントの設定
 plt.rcParams['font.family'] = ['DejaVu Sans', 'Hiragino Sans', 'Yu Gothic', 'Meiryo', 'Takao', 'IPAexGothic', 'IPAPGothic', 'VL PGothic', 'Noto Sans CJK JP']
 
 class CorrelationAnalyzer:
-    def __init__(self, csv_path):
-        """CSVファイルを読み込み、データを準備"""
+    def __init__(self, csv_path, n_resamples=0, seed=0):
+        """CSVファイルを読み込み、データを準備
+
+        Args:
+            csv_path (str): 分析対象のCSVファイル
+            n_resamples (int): ブートストラップ・並べ替え検定のリサンプル回数（0 の場合は解析的なp値のみ）
+            seed (int): リサンプルの乱数シード
+        """
+        self.n_resamples = n_resamples
+        self.seed = seed
         self.df = pd.read_csv(csv_path)
         print(f"データを読み込みました: {len(self.df)} 行")
         print(f"列名: {list(self.df.columns)}")
@@ -85,12 +252,116 @@ class CorrelationAnalyzer:
         print(f"  ピアソン: {interpret_correlation(pearson_corr)}")
         print(f"  スピアマン: {interpret_correlation(spearman_corr)}")
         
-        return {
+        results = {
             'pearson_corr': pearson_corr,
             'pearson_p': pearson_p,
             'spearman_corr': spearman_corr,
             'spearman_p': spearman_p
         }
+        
+        # リサンプリングによる検定（小標本・裾の厚い分布向け）
+        if self.n_resamples:
+            resampled = resampling_test(self.df_clean['jump_width'], self.df_clean['avg_sentiment_score'],
+                                        n_resamples=self.n_resamples, seed=self.seed)
+            results.update(resampled)
+            print(f"\nリサンプリング検定（{self.n_resamples} 回）:")
+            print(f"  ピアソン: 95%信頼区間 [{resampled['pearson_ci_low']:.4f}, {resampled['pearson_ci_high']:.4f}], "
+                  f"並べ替えp値 {resampled['pearson_perm_p']:.4f}")
+            print(f"  スピアマン: 95%信頼区間 [{resampled['spearman_ci_low']:.4f}, {resampled['spearman_ci_high']:.4f}], "
+                  f"並べ替えp値 {resampled['spearman_perm_p']:.4f}")
+        
+        return results
+    
+    def calculate_correlation_matrix(self, features=None, targets=None, group_column='asset', include_pooled=True):
+        """資産 × センチメント指標 × 市場指標のすべての組み合わせの相関を一括計算
+
+        Args:
+            features (list): センチメント側の列（既定: SENTIMENT_FEATURES）
+            targets (list): 市場側の列（既定: MARKET_TARGETS）
+            group_column (str): グループ化する列（資産）
+            include_pooled (bool): 全資産をまとめた 'ALL' グループも計算するか
+
+        Returns:
+            pd.DataFrame: asset, feature, target, n, pearson_corr, pearson_p, spearman_corr, spearman_p
+        """
+        features = [c for c in (features or SENTIMENT_FEATURES) if c in self.df.columns]
+        targets = [c for c in (targets or MARKET_TARGETS) if c in self.df.columns]
+        columns = features + targets
+
+        df = self.df
+        if group_column not in df.columns:
+            df = df.assign(**{group_column: 'ALL'})
+            include_pooled = False
+        if include_pooled:
+            df = pd.concat([df, df.assign(**{group_column: 'ALL'})], ignore_index=True)
+
+        groups, values = stack_groups(df, group_column, columns)
+        # いずれかの列が欠損している行は除く（リストワイズ除去）
+        mask = ~np.isnan(values).any(axis=2)
+        x, y = values[:, :, :len(features)], values[:, :, len(features):]
+
+        pearson, n = batched_pearson(x, y, mask)
+
+        # スピアマン: 有効行だけで順位（同順位は平均）を付け、順位のピアソン相関を計算
+        ranked = stats.rankdata(np.where(mask[..., None], values, np.inf), axis=1)
+        spearman, _ = batched_pearson(ranked[:, :, :len(features)], ranked[:, :, len(features):], mask)
+
+        grid = np.meshgrid(np.arange(len(groups)), np.arange(len(features)), np.arange(len(targets)), indexing='ij')
+        g, f, t = (axis.ravel() for axis in grid)
+        return pd.DataFrame({
+            'asset': np.asarray(groups, dtype=object)[g],
+            'feature': np.asarray(features, dtype=object)[f],
+            'target': np.asarray(targets, dtype=object)[t],
+            'n': n[g].astype(int),
+            'pearson_corr': pearson.ravel(),
+            'pearson_p': correlation_p_values(pearson, n[:, None, None]).ravel(),
+            'spearman_corr': spearman.ravel(),
+            'spearman_p': correlation_p_values(spearman, n[:, None, None]).ravel(),
+        })
+    
+    def daily_series(self, prices, feature='avg_sentiment_score', target='ret'):
+        """日次価格から作った target と、その日の feature を (資産, 取引日) の表にする
+
+        target は jump_detector.compute_rolling_statistics の列（ret, sigma, duration）。
+        列は資産ごとの取引日の通し番号で、センチメントのない日や資産ごとの期間外は NaN。
+        """
+        daily = compute_rolling_statistics(prices)
+        sentiment = self.df.groupby(['asset', 'date'])[feature].mean()
+        keys = pd.MultiIndex.from_arrays([daily['asset'], daily['date'].astype(str)])
+        daily[feature] = sentiment.reindex(keys).to_numpy()
+        x_table = daily.pivot(index='asset', columns='position', values=feature)
+        y_table = daily.pivot(index='asset', columns='position', values=target)
+        return x_table, y_table
+
+    def calculate_lead_lag(self, prices, feature='avg_sentiment_score', target='ret', max_lag=10,
+                           min_overlap=MIN_LEAD_LAG_OVERLAP):
+        """センチメントと日次の市場指標のリード・ラグ相関を全資産まとめて計算
+
+        data.csv はジャンプ日の行しか持たないため、市場指標は日次価格から毎取引日について作り、
+        センチメント（ニュースのある日のみ）を結合する。
+        lag > 0 はセンチメントが lag 取引日だけ先行する（target[t + lag] との相関）ことを表す。
+        有効な組が min_overlap 未満の資産・ラグは結果に含めない。
+
+        Args:
+            prices (pd.DataFrame): asset, date, px_last の日次価格（prices.csv）
+
+        Returns:
+            pd.DataFrame: asset, lag, n, corr, p_value
+        """
+        x_table, y_table = self.daily_series(prices, feature, target)
+        assets = list(x_table.index)
+
+        lags, r, n = masked_cross_correlation(x_table.to_numpy(dtype=float), y_table.to_numpy(dtype=float), max_lag)
+        p = correlation_p_values(r, n)
+
+        results = pd.DataFrame({
+            'asset': np.repeat(assets, len(lags)),
+            'lag': np.tile(lags, len(assets)),
+            'n': n.ravel(),
+            'corr': r.ravel(),
+            'p_value': p.ravel(),
+        })
+        return results[(results['n'] >= min_overlap) & results['corr'].notna()].reset_index(drop=True)
     
     def create_visualizations(self, correlation_results):
         """可視化の作成"""
@@ -273,14 +544,35 @@ def main():
     
     try:
         # 分析の実行
-        analyzer = CorrelationAnalyzer(csv_path)
+        analyzer = CorrelationAnalyzer(csv_path, n_resamples=20000)
         results = analyzer.run_analysis()
         
+        # 資産 × 指標の組み合わせごとの相関
+        matrix_results = analyzer.calculate_correlation_matrix()
+        matrix_results.to_csv('correlation_matrix_results.csv', index=False, encoding='utf-8-sig')
+        print(f"\n=== 資産・指標別の相関 ===")
+        print(matrix_results.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        
+        # リード・ラグ分析（日次価格から毎取引日のリターンを作る）
+        print(f"\n=== リード・ラグ分析（lag > 0: センチメントが先行） ===")
+        if os.path.exists(PRICES_CSV):
+            lead_lag_results = analyzer.calculate_lead_lag(pd.read_csv(PRICES_CSV))
+            lead_lag_results.to_csv('lead_lag_results.csv', index=False, encoding='utf-8-sig')
+            print(f"有効な組が {MIN_LEAD_LAG_OVERLAP} 未満の資産・ラグは除外しました")
+            for asset, group in lead_lag_results.groupby('asset'):
+                best = group.loc[group['corr'].abs().idxmax()]
+                print(f"  {asset}: 最大 |相関| のラグ = {int(best['lag'])} 日 "
+                      f"(r = {best['corr']:.4f}, p = {best['p_value']:.4f}, n = {int(best['n'])})")
+        else:
+            print(f"日次価格 {PRICES_CSV} がないためスキップしました（作り方は jump_detector.py を参照）")
+        
         print(f"\n=== 分析完了 ===")
         print(f"結果:")
         print(f"  ピアソン相関係数: {results['pearson_corr']:.4f}")
         print(f"  スピアマン相関係数: {results['spearman_corr']:.4f}")
         print(f"  グラフファイル: correlation_analysis.png, detailed_correlation_plot.png")
+        print(f"  資産・指標別の相関: correlation_matrix_results.csv")
+        print(f"  リード・ラグ分析: lead_lag_results.csv")
         
     except Exception as e:
         print(f"エラーが発生しました: {e}")
@@ -5,6 +5,8 @@ import time
 from datetime import datetime
 import csv
 
+from url_ranker import UrlRanker, sitemap_candidate
+
 # HTTPリクエスト時のヘッダー
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -20,10 +22,11 @@ def get_soup(url):
         print(f"Error fetching {url}: {e}")
         return None
 
-def get_bloomberg_urls_for_date(target_date_str, max_urls=10):
-    """Bloombergの指定された日付の記事URLを取得する"""
+def get_bloomberg_candidates_for_date(target_date_str):
+    """Bloombergの指定された日付の記事候補（URL・更新時刻・サイトマップのタイトル等）をすべて取得する"""
     print(f"--- Bloombergの記事（{target_date_str}）を取得します ---")
-    urls = []
+    candidates = []
+    seen_urls = set()
     
     # 1. ニュースサイトマップインデックスのみを取得
     sitemap_index_urls = [
@@ -56,26 +59,28 @@ def get_bloomberg_urls_for_date(target_date_str, max_urls=10):
                 if not article_soup:
                     continue
                     
-                # 4. 日付が一致する記事URLを抽出
+                # 4. 日付が一致する記事をすべて候補にする（選択は関連度順に行う）
                 for url_tag in article_soup.find_all('url'):
                     lastmod = url_tag.find('lastmod')
                     if lastmod and lastmod.text.startswith(target_date_str):
-                        article_url = url_tag.find('loc').text
-                        urls.append(article_url)
-                        print(f"記事URL発見: {article_url}")
-                        
-                        # 最大URL数に達したら終了
-                        if len(urls) >= max_urls:
-                            break
+                        candidate = sitemap_candidate(url_tag)
+                        if candidate['url'] and candidate['url'] not in seen_urls:
+                            seen_urls.add(candidate['url'])
+                            candidates.append(candidate)
                 
                 # レート制限対策
                 time.sleep(0.5)
-                
-                # 十分な記事が見つかったら終了
-                if len(urls) >= max_urls:
-                    break
             
-    return urls
+    print(f"候補URL数: {len(candidates)}")
+    return candidates
+
+def get_bloomberg_urls_for_date(target_date_str, max_urls=10, ranker=None):
+    """Bloombergの指定された日付の記事URLを、市場関連度の高い順に取得する"""
+    ranker = ranker or UrlRanker()
+    selected = ranker.select(get_bloomberg_candidates_for_date(target_date_str), max_urls)
+    for candidate in selected:
+        print(f"記事URL選択: {candidate['url']} (関連度 {candidate['relevance_score']:.2f}) {candidate['title']}")
+    return [candidate['url'] for candidate in selected]
 
 def process_csv_with_urls(input_csv_path, output_csv_path, max_urls_per_date=5):
     """
@@ -108,6 +113,7 @@ def process_csv_with_urls(input_csv_path, output_csv_path, max_urls_per_date=5):
     
     # 結果を格納するリスト
     results = []
+    ranker = UrlRanker()
     
     # 各日付についてURLを取得
     for i, date_str in enumerate(unique_dates, 1):
@@ -117,17 +123,19 @@ def process_csv_with_urls(input_csv_path, output_csv_path, max_urls_per_date=5):
             # 日付形式をチェック
             datetime.strptime(date_str, '%Y-%m-%d')
             
-            # BloombergのURLを取得
-            urls = get_bloomberg_urls_for_date(date_str, max_urls_per_date)
+            # BloombergのURLを関連度の高い順に取得
+            selected = ranker.select(get_bloomberg_candidates_for_date(date_str), max_urls_per_date)
             
             # 結果をリストに追加
-            for url in urls:
+            for candidate in selected:
                 results.append({
                     'date': date_str,
-                    'bloomberg_url': url
+                    'bloomberg_url': candidate['url'],
+                    'sitemap_title': candidate['title'],
+                    'relevance_score': candidate['relevance_score']
                 })
             
-            print(f"日付 {date_str}: {len(urls)} 件のURLを取得")
+            print(f"日付 {date_str}: {len(selected)} 件のURLを取得")
             
             # レート制限対策
             time.sleep(1)
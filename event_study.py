@@ -0,0 +1,202 @@
+import os
+import sys
+import warnings
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from jump_detector import PRICES_CSV, require_prices_file
+
+# 価格行列のキャッシュ
+PRICE_MATRIX_CACHE = "price_matrix_cache.npz"
+
+# イベントの定義と期間（取引日）
+POSITIVE_EVENT_THRESHOLD = 0.3
+NEGATIVE_EVENT_THRESHOLD = -0.3
+EVENT_WINDOW = (-5, 10)
+ESTIMATION_WINDOW = (-120, -21)
+
+# EventStudy.run の結果の列
+RESULT_COLUMNS = ['asset', 'event_type', 'relative_day', 'n_events', 'mean_ar', 'mean_car',
+                  'car_ci_low', 'car_ci_high']
+
+def load_price_matrix(prices_csv: str, cache_path: str = PRICE_MATRIX_CACHE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """日次価格（asset, date, px_last）を (日付数, 資産数) の行列にする
+
+    キャッシュには元ファイルのパスと更新時刻を保存し、同じファイルから作ったキャッシュだけを再利用する。
+
+    Returns:
+        (日付の配列, 資産の配列, 価格行列)。取引のない日は NaN
+    """
+    source = os.path.abspath(prices_csv)
+    source_mtime = os.path.getmtime(prices_csv)
+    if os.path.exists(cache_path):
+        with np.load(cache_path, allow_pickle=False) as cache:
+            if ('source' in cache.files and str(cache['source']) == source
+                    and float(cache['source_mtime']) == source_mtime):
+                return cache['dates'], cache['assets'], cache['prices']
+
+    prices = pd.read_csv(prices_csv, usecols=['asset', 'date', 'px_last'])
+    table = prices.pivot_table(index='date', columns='asset', values='px_last', aggfunc='last').sort_index()
+    dates = table.index.to_numpy(dtype=str)
+    assets = table.columns.to_numpy(dtype=str)
+    matrix = table.to_numpy(dtype=float)
+    np.savez(cache_path, dates=dates, assets=assets, prices=matrix,
+             source=np.array(source), source_mtime=np.array(source_mtime))
+    return dates, assets, matrix
+
+class EventStudy:
+    def __init__(self, dates: np.ndarray, assets: np.ndarray, prices: np.ndarray,
+                 event_window: Tuple[int, int] = EVENT_WINDOW, estimation_window: Tuple[int, int] = ESTIMATION_WINDOW):
+        """価格行列からイベント前後の異常リターン（平均調整モデル）を一括計算
+
+        期間は資産ごとの取引日（価格のある日）で数える。
+
+        Args:
+            dates, assets, prices: load_price_matrix の戻り値
+            event_window (tuple): イベント日を0とした期間（両端を含む）
+            estimation_window (tuple): 正常リターンを推定する期間（両端を含む）
+        """
+        self.assets = list(assets)
+        self.event_window = event_window
+        self.estimation_window = estimation_window
+
+        # 資産ごとの取引日とリターンを1本の配列に連結（資産 j は starts[j]～ends[j]-1）
+        dates = np.asarray(dates, dtype=str)
+        traded = ~np.isnan(prices)
+        self.asset_dates = [dates[traded[:, j]] for j in range(prices.shape[1])]
+        lengths = traded.sum(axis=0)
+        self.ends = np.cumsum(lengths)
+        self.starts = self.ends - lengths
+        returns = []
+        for j in range(prices.shape[1]):
+            px = prices[traded[:, j], j]
+            returns.append(np.concatenate([[np.nan], px[1:] / px[:-1] - 1])[:len(px)])
+        self.returns = np.concatenate(returns) if returns else np.zeros(0)
+
+    def _window_returns(self, positions: np.ndarray, columns: np.ndarray, window: Tuple[int, int]) -> np.ndarray:
+        """(イベント数, 期間の長さ) のリターン行列（資産のデータの範囲外は NaN）"""
+        offsets = np.arange(window[0], window[1] + 1)
+        index = positions[:, None] + offsets[None, :]
+        inside = (index >= self.starts[columns][:, None]) & (index < self.ends[columns][:, None])
+        values = self.returns[np.clip(index, 0, max(len(self.returns) - 1, 0))]
+        return np.where(inside, values, np.nan)
+
+    def locate_events(self, events: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """イベント（asset, date）を連結したリターン配列の位置に変換
+
+        その資産の取引日でない日付は、その資産の次の取引日に合わせる。
+
+        Returns:
+            (位置, 資産の列番号, 使用したイベントのマスク)
+        """
+        asset_index = {asset: i for i, asset in enumerate(self.assets)}
+        columns = events['asset'].map(asset_index).to_numpy(dtype=float)
+        event_dates = events['date'].astype(str).to_numpy()
+        positions = np.full(len(events), -1, dtype=np.int64)
+        for j in np.unique(columns[~np.isnan(columns)]).astype(int):
+            mask = columns == j
+            rows = np.searchsorted(self.asset_dates[j], event_dates[mask], side='left')
+            positions[mask] = np.where(rows < len(self.asset_dates[j]), self.starts[j] + rows, -1)
+        valid = positions >= 0
+        return positions[valid], columns[valid].astype(int), valid
+
+    def abnormal_returns(self, events: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """(イベント数, 期間の長さ) の異常リターンと、使用したイベントのマスク"""
+        positions, columns, valid = self.locate_events(events)
+        window_returns = self._window_returns(positions, columns, self.event_window)
+        estimation_returns = self._window_returns(positions, columns, self.estimation_window)
+        with warnings.catch_warnings():
+            # 推定期間がすべて NaN のイベント（系列の先頭付近）は NaN のままにする
+            warnings.simplefilter('ignore', RuntimeWarning)
+            normal = np.nanmean(estimation_returns, axis=1)
+        return window_returns - normal[:, None], valid
+
+    def run(self, events: pd.DataFrame, confidence: float = 0.95) -> pd.DataFrame:
+        """イベントの種類・資産ごとの平均異常リターンと累積異常リターン（CAR）の推移
+
+        Args:
+            events (pd.DataFrame): asset, date, event_type の列を持つイベント
+
+        Returns:
+            pd.DataFrame: RESULT_COLUMNS の列（イベントがなければ空の表）
+        """
+        ar, valid = self.abnormal_returns(events)
+        events = events[valid].reset_index(drop=True)
+        if len(events) == 0:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        # その日の異常リターンがないイベント（データの範囲外）はその日以降の平均と件数に含めない
+        car = np.cumsum(np.nan_to_num(ar), axis=1)
+        car[np.isnan(ar)] = np.nan
+        relative_days = np.arange(self.event_window[0], self.event_window[1] + 1)
+
+        rows = []
+        groups = events.groupby(['asset', 'event_type']).indices
+        for event_type in pd.unique(events['event_type']):
+            groups[('ALL', event_type)] = np.flatnonzero(events['event_type'].to_numpy() == event_type)
+        for (asset, event_type), index in groups.items():
+            group_ar, group_car = ar[index], car[index]
+            n = np.sum(~np.isnan(group_car), axis=0)
+            with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+                warnings.simplefilter('ignore', RuntimeWarning)
+                mean_ar = np.nanmean(group_ar, axis=0)
+                mean_car = np.nanmean(group_car, axis=0)
+                se = np.nanstd(group_car, axis=0, ddof=1) / np.sqrt(n)
+            margin = stats.t.ppf(0.5 + confidence / 2, np.clip(n - 1, 1, None)) * se
+            rows.append(pd.DataFrame({
+                'asset': asset,
+                'event_type': event_type,
+                'relative_day': relative_days,
+                'n_events': n,
+                'mean_ar': mean_ar,
+                'mean_car': mean_car,
+                'car_ci_low': mean_car - margin,
+                'car_ci_high': mean_car + margin,
+            }))
+        return pd.concat(rows, ignore_index=True)[RESULT_COLUMNS]
+
+def select_events(sentiment_df: pd.DataFrame, feature: str = 'avg_sentiment_score',
+                  positive: float = POSITIVE_EVENT_THRESHOLD, negative: float = NEGATIVE_EVENT_THRESHOLD) -> pd.DataFrame:
+    """センチメントが強い（資産, 日付）をイベントとして抽出"""
+    df = sentiment_df.dropna(subset=[feature])
+    event_type = np.where(df[feature] >= positive, 'positive', np.where(df[feature] <= negative, 'negative', ''))
+    return df.assign(event_type=event_type)[event_type != ''][['asset', 'date', 'event_type', feature]]
+
+def main():
+    """メイン関数"""
+    prices_file = PRICES_CSV
+    sentiment_file = "data_with_sentiment_scores_correct.csv"
+    output_file = "event_study_results.csv"
+
+    print("=== 高センチメントのニュース前後のイベントスタディ ===")
+    print(f"価格データ: {prices_file}")
+    print(f"センチメント: {sentiment_file}")
+    print(f"イベント: スコア >= {POSITIVE_EVENT_THRESHOLD}（ポジティブ） / <= {NEGATIVE_EVENT_THRESHOLD}（ネガティブ）")
+    print(f"イベント期間: {EVENT_WINDOW}, 推定期間: {ESTIMATION_WINDOW}")
+    require_prices_file(prices_file)
+
+    try:
+        study = EventStudy(*load_price_matrix(prices_file))
+        events = select_events(pd.read_csv(sentiment_file))
+        print(f"イベント数: {len(events)}")
+
+        results = study.run(events)
+        results.to_csv(output_file, index=False, encoding='utf-8-sig')
+        print(f"結果を保存しました: {output_file}")
+
+        print(f"\n=== イベント期間末のCAR ===")
+        final = results[results['relative_day'] == EVENT_WINDOW[1]]
+        print(final[['asset', 'event_type', 'n_events', 'mean_car', 'car_ci_low', 'car_ci_high']]
+              .to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+import json
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from sentiment_analyzer_correct import CorrectSentimentAnalyzer, load_news_titles
+
+# 埋め込みインデックスの保存先
+EMBEDDING_INDEX_DIR = "headline_embeddings"
+# in_memory=True のとき float32 のコピーを保持する索引の上限（これを超える索引はブロック単位で検索）
+IN_MEMORY_MAX_BYTES = 256 * 1024 ** 2
+
+class HeadlineEmbedder:
+    def __init__(self, analyzer: CorrectSentimentAnalyzer, batch_size: int = 32):
+        """読み込み済みのBERTエンコーダーでヘッドラインの埋め込みを計算"""
+        if analyzer.backend != "pytorch":
+            raise ValueError("埋め込みの計算には PyTorch バックエンドの分析器が必要です")
+        self.analyzer = analyzer
+        self.encoder = analyzer.model.bert
+        self.batch_size = batch_size
+
+    @property
+    def dimension(self) -> int:
+        return self.encoder.config.hidden_size
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """最終層の平均プーリング（パディング除外）をL2正規化したベクトルを返す"""
+        import torch
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            inputs = self.analyzer.tokenizer(
+                texts[start:start + self.batch_size], return_tensors="pt", truncation=True, padding=True
+            )
+            with torch.no_grad():
+                hidden = self.encoder(**inputs).last_hidden_state
+            mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            vectors.append(torch.nn.functional.normalize(pooled.float(), dim=1).numpy())
+        if not vectors:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.concatenate(vectors, axis=0)
+
+def build_embedding_index(embedder: HeadlineEmbedder, titles: List[str],
+                          index_dir: str = EMBEDDING_INDEX_DIR, chunk_size: int = 1024) -> str:
+    """全ヘッドラインの埋め込みを連続したfloat16行列としてディスクに書き出す"""
+    os.makedirs(index_dir, exist_ok=True)
+    matrix = np.lib.format.open_memmap(
+        os.path.join(index_dir, "embeddings.npy"), mode="w+",
+        dtype=np.float16, shape=(len(titles), embedder.dimension)
+    )
+    for start in range(0, len(titles), chunk_size):
+        matrix[start:start + chunk_size] = embedder.embed(titles[start:start + chunk_size])
+        print(f"  埋め込み計算済み: {min(start + chunk_size, len(titles))}/{len(titles)}")
+    matrix.flush()
+    del matrix
+
+    with open(os.path.join(index_dir, "titles.json"), "w", encoding="utf-8") as f:
+        json.dump(titles, f, ensure_ascii=False)
+    return index_dir
+
+def _top_k(similarities: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """行ごとの上位k件（類似度の降順）のインデックスと類似度（列数が k 未満なら列数まで）"""
+    k = min(k, similarities.shape[1])
+    if k == 0:
+        return (np.zeros((len(similarities), 0), dtype=np.int64),
+                np.zeros((len(similarities), 0), dtype=similarities.dtype))
+    part = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(similarities, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+def _normalized_rows(rows: np.ndarray) -> np.ndarray:
+    """float16 の行を float32 に変換し、丸めで崩れたノルムを正規化し直す（検索経路によらず同じ値にする）"""
+    rows = np.asarray(rows, dtype=np.float32)
+    return rows / np.linalg.norm(rows, axis=-1, keepdims=True).clip(min=1e-12)
+
+def _pad_top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """候補が k 件に満たない行を、インデックス -1・類似度 -inf で埋めて (クエリ数, k) にする"""
+    padded_ids = np.full((len(ids), k), -1, dtype=np.int64)
+    padded_scores = np.full((len(ids), k), -np.inf, dtype=np.float32)
+    padded_ids[:, :ids.shape[1]] = ids
+    padded_scores[:, :scores.shape[1]] = scores
+    return padded_ids, padded_scores
+
+class HeadlineIndex:
+    def __init__(self, index_dir: str = EMBEDDING_INDEX_DIR, in_memory: bool = False):
+        """メモリマップした埋め込み行列に対するコサイン類似度検索
+
+        Args:
+            index_dir (str): build_embedding_index の保存先
+            in_memory (bool): 正規化済みの float32 行列をメモリに保持するか（既定はメモリマップした
+                float16 行列をブロック単位で読む。IN_MEMORY_MAX_BYTES を超える索引は保持しない）
+        """
+        self.index_dir = index_dir
+        self.embeddings = np.load(os.path.join(index_dir, "embeddings.npy"), mmap_mode="r")
+        with open(os.path.join(index_dir, "titles.json"), encoding="utf-8") as f:
+            self.titles = json.load(f)
+        self.vectors = None
+        if in_memory:
+            size = self.embeddings.shape[0] * self.embeddings.shape[1] * 4
+            if size <= IN_MEMORY_MAX_BYTES:
+                self.vectors = _normalized_rows(self.embeddings)
+            else:
+                print(f"警告: 索引が大きいため（{size / 1024 ** 2:.0f} MB）メモリに保持せずブロック単位で検索します")
+        self.centroids = None
+        if os.path.exists(os.path.join(index_dir, "ivf_centroids.npy")):
+            self._load_ivf()
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def search(self, queries: np.ndarray, k: int = 10, block_size: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+        """厳密なtop-k検索。(クエリ数, k) のインデックスと類似度を返す（索引が k 件未満なら -1 / -inf で埋める）
+
+        メモリに保持した行列があれば1回の行列積で、なければブロック単位で行列積を計算して上位候補をマージする。
+        """
+        queries = np.atleast_2d(queries).astype(np.float32)
+        if self.vectors is not None:
+            # (行数, 次元) @ (次元, クエリ数) の順にすると行列を1回だけ連続して読む
+            return _pad_top_k(*_top_k((self.vectors @ queries.T).T, k), k)
+
+        best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(self.titles), block_size):
+            block = _normalized_rows(self.embeddings[start:start + block_size])
+            ids, scores = _top_k((block @ queries.T).T, k)
+            best_ids = np.concatenate([best_ids, ids + start], axis=1)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            order, best_scores = _top_k(best_scores, k)
+            best_ids = np.take_along_axis(best_ids, order, axis=1)
+        return _pad_top_k(best_ids, best_scores, k)
+
+    def build_ivf(self, n_lists: int = None, iterations: int = 10, sample_size: int = 50000,
+                  block_size: int = 65536, seed: int = 0):
+        """近似検索用の転置ファイル（k-meansのクラスタごとに行を並べ替えた索引）を作成"""
+        n = len(self.titles)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+
+        # サンプルでk-means（球面: 内積で割り当て、平均を正規化）
+        sample = _normalized_rows(self.embeddings[np.sort(rng.choice(n, min(n, sample_size), replace=False))])
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True).clip(min=1e-12)
+
+        # 全行をクラスタに割り当て、クラスタ順の行番号と区切り位置を保存
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, block_size):
+            block = _normalized_rows(self.embeddings[start:start + block_size])
+            assign[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+
+        np.save(os.path.join(self.index_dir, "ivf_centroids.npy"), centroids.astype(np.float32))
+        np.save(os.path.join(self.index_dir, "ivf_order.npy"), order)
+        np.save(os.path.join(self.index_dir, "ivf_offsets.npy"), offsets)
+        self._load_ivf()
+
+    def _load_ivf(self):
+        self.centroids = np.load(os.path.join(self.index_dir, "ivf_centroids.npy"))
+        self.ivf_order = np.load(os.path.join(self.index_dir, "ivf_order.npy"), mmap_mode="r")
+        self.ivf_offsets = np.load(os.path.join(self.index_dir, "ivf_offsets.npy"))
+
+    def search_approximate(self, queries: np.ndarray, k: int = 10, n_probe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """近似top-k検索: 近いクラスタ n_probe 個の中だけを厳密に検索
+
+        search と同じ (クエリ数, k) の配列を返す。候補が k 件に満たないクエリは -1 / -inf で埋める。
+        """
+        if self.centroids is None:
+            raise ValueError("近似検索の索引がありません（先に build_ivf を実行してください）")
+        queries = np.atleast_2d(queries).astype(np.float32)
+        nearest_lists, _ = _top_k(queries @ self.centroids.T, n_probe)
+
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, (query, lists) in enumerate(zip(queries, nearest_lists)):
+            candidates = np.concatenate([
+                self.ivf_order[self.ivf_offsets[c]:self.ivf_offsets[c + 1]] for c in lists
+            ])
+            if len(candidates) == 0:
+                continue
+            candidates.sort()  # メモリマップを前から順に読む
+            if self.vectors is not None:
+                vectors = self.vectors[candidates]
+            else:
+                vectors = _normalized_rows(self.embeddings[candidates])
+            ids, scores = _top_k((vectors @ query)[None, :], k)
+            all_ids[q, :ids.shape[1]] = candidates[ids[0]]
+            all_scores[q, :scores.shape[1]] = scores[0]
+        return all_ids, all_scores
+
+def main():
+    """メイン関数: ヘッドラインの埋め込み索引を作成して類似検索を実行"""
+    input_file = "data_with_news_titles.csv"
+    top_k = 5
+
+    print("=== ヘッドライン埋め込み・類似ニュース検索 ===")
+    print(f"入力ファイル: {input_file}")
+    print(f"索引の保存先: {EMBEDDING_INDEX_DIR}")
+
+    try:
+        analyzer = CorrectSentimentAnalyzer()
+        embedder = HeadlineEmbedder(analyzer)
+
+        titles = load_news_titles(input_file)
+        print(f"ユニークなタイトル数: {len(titles)}")
+        build_embedding_index(embedder, titles)
+
+        index = HeadlineIndex()
+        index.build_ivf()
+
+        query_text = titles[0]
+        query = embedder.embed([query_text])
+        print(f"\nクエリ: {query_text}")
+
+        start = time.perf_counter()
+        ids, scores = index.search(query, top_k)
+        exact_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        approx_ids, _ = index.search_approximate(query, top_k)
+        approx_ms = (time.perf_counter() - start) * 1000
+
+        print(f"厳密検索: {exact_ms:.2f} ms / 近似検索: {approx_ms:.2f} ms "
+              f"(上位{top_k}件の一致: {len(set(ids[0]) & set(approx_ids[0]))}/{top_k})")
+        for rank, (i, score) in enumerate(zip(ids[0], scores[0]), 1):
+            print(f"  {rank}. {score:.4f} {index.titles[i]}")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
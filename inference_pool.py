@@ -0,0 +1,145 @@
+import multiprocessing as mp
+import os
+import sys
+import time
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+import torch
+
+from sentiment_analyzer_correct import (
+    CorrectSentimentAnalyzer,
+    split_news_titles,
+    summarize_scores,
+    load_news_titles,
+)
+
+# fork前に読み込んだ分析器（子プロセスはコピーオンライトで重みを共有する）
+_SHARED_ANALYZER = None
+
+def _init_worker(num_threads: int):
+    """ワーカープロセスの初期化: intra-opスレッド数を設定"""
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # 親プロセスで並列処理が実行済みの場合は設定できない（初期化子が例外を出すとワーカーが再起動を繰り返す）
+        pass
+
+def _score_batch(batch: List[str]) -> np.ndarray:
+    """ワーカー内で1バッチ分の確率を計算"""
+    return np.asarray(_SHARED_ANALYZER.predict_probabilities(batch, batch_size=len(batch)))
+
+class SentimentInferencePool:
+    def __init__(self, analyzer: CorrectSentimentAnalyzer, num_workers: int = None,
+                 threads_per_worker: int = None):
+        """モデル読み込み後にワーカーをforkする推論プール
+
+        親プロセスで推論を実行する前に作成すること（OpenMPのスレッドプールはforkを跨げない）。
+
+        Args:
+            analyzer (CorrectSentimentAnalyzer): 読み込み済みの分析器
+            num_workers (int): ワーカー数（デフォルト: CPUコア数）
+            threads_per_worker (int): ワーカーごとのintra-opスレッド数（デフォルト: コア数 / ワーカー数）
+        """
+        global _SHARED_ANALYZER
+
+        cpu_count = os.cpu_count() or 1
+        self.num_workers = num_workers or cpu_count
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.num_workers)
+        self.analyzer = analyzer
+
+        _SHARED_ANALYZER = analyzer
+        context = mp.get_context("fork")
+        self.pool = context.Pool(
+            self.num_workers,
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,),
+        )
+        print(f"推論プールを起動しました: ワーカー {self.num_workers} 個 × スレッド {self.threads_per_worker}")
+
+    def predict_probabilities(self, texts: List[str], batch_size: int = 32) -> torch.Tensor:
+        """分析器と同じAPIで、バッチをワーカーに分散して確率を計算（入力順を保持）"""
+        batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+        if not batches:
+            return torch.zeros((0, 3))
+        results = self.pool.imap(_score_batch, batches)
+        return torch.from_numpy(np.concatenate(list(results), axis=0))
+
+    def get_sentiment_scores(self, texts: List[str], batch_size: int = 32) -> List[float]:
+        """複数テキストの感情スコア（Pos - Neg）を計算"""
+        probs = self.predict_probabilities(texts, batch_size)
+        return (probs[:, 2] - probs[:, 1]).tolist()
+
+    def close(self):
+        """ワーカーを終了"""
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def process_csv_with_pool(pool: SentimentInferencePool, input_file: str, output_file: str,
+                          batch_size: int = 32) -> pd.DataFrame:
+    """推論プールで全タイトルを一括スコアリングし、CorrectSentimentAnalyzer.process_csv と同じ列を追加"""
+    print(f"CSVファイルを読み込み中: {input_file}")
+    df = pd.read_csv(input_file)
+    print(f"データ行数: {len(df)}")
+
+    row_titles = [split_news_titles(v) for v in df['news_titles']]
+    unique_titles = list(dict.fromkeys(t for titles in row_titles for t in titles))
+    print(f"ユニークなタイトル数: {len(unique_titles)}")
+
+    scores = dict(zip(unique_titles, pool.get_sentiment_scores(unique_titles, batch_size)))
+    results = pd.DataFrame([summarize_scores([scores[t] for t in titles]) for titles in row_titles])
+    for column in results.columns:
+        df[column] = results[column].values
+
+    df.to_csv(output_file, index=False)
+    print(f"結果を保存しました: {output_file}")
+    return df
+
+def main():
+    """メイン関数: ワーカー数ごとのスループットを比較"""
+    input_file = "data_with_news_titles.csv"
+    batch_size = 8
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, max(1, cpu_count // 2), cpu_count})
+
+    print("=== マルチプロセス推論プール ===")
+    print(f"入力ファイル: {input_file}")
+    print(f"CPUコア数: {cpu_count}")
+
+    try:
+        # モデルは親プロセスで一度だけ読み込む
+        analyzer = CorrectSentimentAnalyzer()
+        titles = load_news_titles(input_file)
+        print(f"ユニークなタイトル数: {len(titles)}")
+
+        baseline = None
+        for num_workers in worker_counts:
+            with SentimentInferencePool(analyzer, num_workers=num_workers) as pool:
+                # ウォームアップ（各ワーカーに最低1バッチ）
+                pool.predict_probabilities(titles[:batch_size * num_workers], batch_size)
+
+                start = time.perf_counter()
+                pool.predict_probabilities(titles, batch_size)
+                elapsed = time.perf_counter() - start
+
+            throughput = len(titles) / elapsed if elapsed > 0 else 0.0
+            baseline = baseline or throughput
+            print(f"  ワーカー {num_workers:3d}: {throughput:8.1f} 件/秒 "
+                  f"(x{throughput / baseline:.2f}, 効率 {throughput / baseline / num_workers * 100:.0f}%)")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# ジャンプの定義: |ret| > JUMP_THRESHOLD * sigma（sigma は前日までの VOLATILITY_WINDOW 日のリターンの標準偏差）
+JUMP_THRESHOLD = 2.0
+VOLATILITY_WINDOW = 20
+# ジャンプ後に同じ方向の値動きがこの日数以上続けば long_term
+LONG_TERM_DURATION = 5
+
+# 日次価格の入力ファイル（リポジトリには含まれない）
+PRICES_CSV = "prices.csv"
+
+# data.csv の列
+DATA_COLUMNS = ['asset', 'date', 'CURRENCY', 'px_last', 'ret', 'sigma', 'is_jump',
+                'jump_width', 'duration', 'trend_type']
+
+def require_prices_file(path: str = PRICES_CSV):
+    """日次価格のCSVがなければ作り方を表示して終了"""
+    if os.path.exists(path):
+        return
+    print(f"エラー: 日次価格のファイル {path} が見つかりません（リポジトリには含まれていません）")
+    print("data.csv の資産（NKY Index, SPX Index, USDJPY Curncy, USGG10YR Index）の日次終値を")
+    print("Bloomberg端末（BDH の PX_LAST）などから書き出し、1行に1資産・1日で次の列を持つCSVとして保存してください:")
+    print("  asset, date（YYYY-MM-DD）, px_last, CURRENCY（任意）")
+    print("ボラティリティや正常リターンの推定期間があるため、分析期間より前の日付も含めてください。")
+    sys.exit(1)
+
+def prepare_prices(prices: pd.DataFrame) -> pd.DataFrame:
+    """価格データ（asset, date, px_last[, CURRENCY]）を資産・日付順に並べ、資産内の位置を付ける"""
+    prices = prices.dropna(subset=['px_last']).sort_values(['asset', 'date'], kind='stable').reset_index(drop=True)
+    prices['position'] = prices.groupby('asset', sort=False).cumcount().to_numpy()
+    return prices
+
+def segment_rolling_sum(values: np.ndarray, position: np.ndarray, window: int) -> np.ndarray:
+    """資産ごとに区切られた連続配列の、直近 window 件の移動和（累積和の差で一括計算、足りない行は NaN）"""
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    index = np.arange(len(values))
+    sums = cumulative[index + 1] - cumulative[np.clip(index + 1 - window, 0, None)]
+    return np.where(position >= window - 1, sums, np.nan)
+
+def compute_returns(prices: pd.DataFrame) -> np.ndarray:
+    """資産ごとの単純リターン（各資産の最初の行は NaN）"""
+    px = prices['px_last'].to_numpy(dtype=float)
+    ret = np.full(len(px), np.nan)
+    ret[1:] = px[1:] / px[:-1] - 1
+    ret[prices['position'].to_numpy() == 0] = np.nan
+    return ret
+
+def rolling_volatility(ret: np.ndarray, position: np.ndarray, window: int) -> np.ndarray:
+    """前日までの window 日のリターンの標準偏差（ddof=1）。当日のリターンは含めない"""
+    valid = ~np.isnan(ret)
+    x = np.where(valid, ret, 0.0)
+    # リターンは各資産の2行目から。1つ前の行までの window 件を使うため位置を2つずらす
+    return_position = position - 1
+    count = segment_rolling_sum(valid.astype(float), return_position, window)
+    total = segment_rolling_sum(x, return_position, window)
+    total_sq = segment_rolling_sum(x * x, return_position, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (total_sq - total ** 2 / count) / (count - 1)
+    sigma = np.sqrt(np.clip(variance, 0, None))
+
+    shifted = np.full(len(sigma), np.nan)
+    shifted[1:] = sigma[:-1]
+    shifted[position == 0] = np.nan
+    return shifted
+
+def forward_streaks(ret: np.ndarray, asset_codes: np.ndarray) -> np.ndarray:
+    """各日の翌日以降、同じ符号のリターンが何日続くか（資産をまたがない）"""
+    sign = np.sign(np.nan_to_num(ret))
+    change = np.ones(len(sign), dtype=bool)
+    change[1:] = (sign[1:] != sign[:-1]) | (asset_codes[1:] != asset_codes[:-1])
+    run_id = np.cumsum(change) - 1
+    run_start = np.flatnonzero(change)
+    run_length = np.diff(np.concatenate([run_start, [len(sign)]]))
+    position_in_run = np.arange(len(sign)) - run_start[run_id]
+    remaining = run_length[run_id] - position_in_run - 1
+    return np.where(sign != 0, remaining, 0)
+
+def compute_rolling_statistics(prices: pd.DataFrame, window: int = VOLATILITY_WINDOW) -> pd.DataFrame:
+    """リターン・ボラティリティ・同符号の継続日数を付けた価格データ"""
+    prices = prepare_prices(prices)
+    position = prices['position'].to_numpy()
+    ret = compute_returns(prices)
+    prices['ret'] = ret
+    prices['sigma'] = rolling_volatility(ret, position, window)
+    prices['duration'] = forward_streaks(ret, pd.factorize(prices['asset'])[0])
+    return prices
+
+def detect_jumps(prices: pd.DataFrame, threshold: float = JUMP_THRESHOLD, window: int = VOLATILITY_WINDOW,
+                 long_term_duration: int = LONG_TERM_DURATION, jumps_only: bool = True) -> pd.DataFrame:
+    """価格データからジャンプを検出し、data.csv と同じ列の表を返す
+
+    Args:
+        prices (pd.DataFrame): asset, date, px_last（と任意で CURRENCY）の列を持つ日次価格
+        threshold (float): ジャンプとみなす |ret| / sigma の下限
+        window (int): ボラティリティの計算期間（営業日）
+        long_term_duration (int): trend_type を long_term とする継続日数の下限
+        jumps_only (bool): ジャンプの行だけを返すか（data.csv と同じ）
+    """
+    stats = compute_rolling_statistics(prices, window)
+    if 'CURRENCY' not in stats.columns:
+        stats['CURRENCY'] = ''
+
+    stats['is_jump'] = np.abs(stats['ret']) > threshold * stats['sigma']
+    stats['jump_width'] = stats['ret'].where(stats['is_jump'])
+    stats['duration'] = stats['duration'].where(stats['is_jump'], 0).astype(int)
+    stats['trend_type'] = np.where(stats['duration'] >= long_term_duration, 'long_term', 'short_term')
+
+    if jumps_only:
+        stats = stats[stats['is_jump']]
+    return stats[DATA_COLUMNS].reset_index(drop=True)
+
+def main():
+    """メイン関数"""
+    input_file = PRICES_CSV
+    output_file = "data_detected.csv"
+
+    print("=== 価格データからのジャンプ検出 ===")
+    print(f"入力ファイル: {input_file}")
+    print(f"出力ファイル: {output_file}")
+    print(f"ジャンプの条件: |ret| > {JUMP_THRESHOLD} × sigma（{VOLATILITY_WINDOW} 日）")
+    require_prices_file(input_file)
+
+    try:
+        prices = pd.read_csv(input_file)
+        print(f"価格データ: {len(prices)} 行, {prices['asset'].nunique()} 資産")
+
+        start = time.perf_counter()
+        jumps = detect_jumps(prices)
+        print(f"検出時間: {time.perf_counter() - start:.3f} 秒")
+
+        jumps.to_csv(output_file, index=False)
+        print(f"ジャンプ: {len(jumps)} 件を保存しました: {output_file}")
+        print(jumps.groupby('asset').agg(jumps=('is_jump', 'size'),
+                                         long_term=('trend_type', lambda v: (v == 'long_term').sum())))
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
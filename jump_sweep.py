@@ -0,0 +1,154 @@
+import sys
+import time
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from jump_detector import PRICES_CSV, prepare_prices, compute_returns, rolling_volatility, require_prices_file
+
+# 既定の探索範囲
+THRESHOLDS = np.round(np.arange(1.5, 4.01, 0.1), 2)
+WINDOWS = [10, 20, 40, 60, 120]
+
+class JumpThresholdSweep:
+    def __init__(self, prices: pd.DataFrame, sentiment: pd.DataFrame, feature: str = 'avg_sentiment_score'):
+        """ジャンプの定義（k・sigma のしきい値とボラティリティの期間）を変えたときの相関を一括計算
+
+        リターンと、期間ごとのボラティリティは一度だけ計算してキャッシュする。
+        相関はセンチメントのあるジャンプだけで計算する。data_with_sentiment_scores_correct.csv は
+        元の定義（2 sigma・20日）のジャンプ日にしかセンチメントがないため、それ以外の定義では
+        一部のジャンプしか測れない。結果の sentiment_coverage（n_with_sentiment / n_jumps）で確認し、
+        全日付のセンチメント（asset 列のない date ごとの表も可）を渡せば全ジャンプを対象にできる。
+
+        Args:
+            prices (pd.DataFrame): asset, date, px_last の日次価格
+            sentiment (pd.DataFrame): asset, date と feature の列、または date と feature の列（全資産に共通）
+            feature (str): センチメント側の列
+        """
+        self.prices = prepare_prices(prices)
+        self.position = self.prices['position'].to_numpy()
+        self.ret = compute_returns(self.prices)
+        self.abs_ret = np.abs(self.ret)
+
+        keys = ['asset', 'date'] if 'asset' in sentiment.columns else ['date']
+        merged = self.prices[['asset', 'date']].merge(
+            sentiment[keys + [feature]].drop_duplicates(keys), on=keys, how='left'
+        )
+        self.sentiment = merged[feature].to_numpy(dtype=float)
+
+        # 資産の番号（prepare_prices で資産順に並んでいる）
+        self.assets, self.asset_codes = np.unique(self.prices['asset'].to_numpy(), return_inverse=True)
+        self._sigma: Dict[int, np.ndarray] = {}
+
+    def sigma(self, window: int) -> np.ndarray:
+        """期間ごとのボラティリティ（キャッシュ）"""
+        if window not in self._sigma:
+            self._sigma[window] = rolling_volatility(self.ret, self.position, window)
+        return self._sigma[window]
+
+    def _jump_bins(self, window: int, thresholds: np.ndarray) -> np.ndarray:
+        """各行が何個のしきい値でジャンプになるか（昇順のしきい値のうち |ret| / sigma 未満の数）"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = self.abs_ret / self.sigma(window)
+        # sigma が NaN の行や 0 / 0 はどのしきい値でもジャンプにしない
+        ratio = np.where(np.isnan(ratio), -np.inf, ratio)
+        return np.searchsorted(thresholds, ratio, side='left')
+
+    def _jump_sums(self, bins: np.ndarray, values: np.ndarray, num_thresholds: int) -> np.ndarray:
+        """しきい値ごと・資産ごとのジャンプ行の合計 (しきい値数, 資産数)
+
+        (資産, ビン) ごとに1回だけ合計し、ビンの逆順の累積和でしきい値ごとの合計にする
+        （しきい値 k でジャンプになるのはビンが k より大きい行）。メモリは行数に比例する。
+        """
+        width = num_thresholds + 1
+        table = np.bincount(self.asset_codes * width + bins, weights=values,
+                            minlength=len(self.assets) * width).reshape(len(self.assets), width)
+        return np.cumsum(table[:, ::-1], axis=1)[:, ::-1][:, 1:].T
+
+    def run(self, thresholds: Iterable[float] = THRESHOLDS, windows: Iterable[int] = WINDOWS) -> pd.DataFrame:
+        """しきい値 × 期間の格子で、資産ごとのジャンプ数とジャンプ幅・センチメントの相関を返す"""
+        thresholds = np.sort(np.asarray(list(thresholds), dtype=float))
+        has_sentiment = ~np.isnan(self.sentiment)
+        x = np.where(has_sentiment, np.nan_to_num(self.ret), 0.0)
+        y = np.where(has_sentiment, self.sentiment, 0.0)
+        weights = has_sentiment.astype(float)
+
+        rows = []
+        for window in windows:
+            bins = self._jump_bins(window, thresholds)
+            n_jumps = self._jump_sums(bins, np.ones(len(bins)), len(thresholds))
+            n = self._jump_sums(bins, weights, len(thresholds))
+            sum_x = self._jump_sums(bins, x, len(thresholds))
+            sum_y = self._jump_sums(bins, y, len(thresholds))
+            sum_xx = self._jump_sums(bins, x * x, len(thresholds))
+            sum_yy = self._jump_sums(bins, y * y, len(thresholds))
+            sum_xy = self._jump_sums(bins, x * y, len(thresholds))
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cov = sum_xy - sum_x * sum_y / n
+                var_x = sum_xx - sum_x ** 2 / n
+                var_y = sum_yy - sum_y ** 2 / n
+                r = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+                r = np.where((n >= 3) & (var_x > 1e-15) & (var_y > 1e-15), r, np.nan)
+                t = r * np.sqrt((n - 2) / np.clip(1 - r ** 2, 1e-300, None))
+                coverage = n / n_jumps
+            p = np.where(n >= 3, 2 * stats.t.sf(np.abs(t), np.clip(n - 2, 1, None)), np.nan)
+
+            for k, threshold in enumerate(thresholds):
+                for a, asset in enumerate(self.assets):
+                    rows.append({
+                        'asset': asset,
+                        'window': window,
+                        'threshold': threshold,
+                        'n_jumps': int(round(n_jumps[k, a])),
+                        'n_with_sentiment': int(round(n[k, a])),
+                        'sentiment_coverage': coverage[k, a],
+                        'corr': r[k, a],
+                        'p_value': p[k, a],
+                    })
+        return pd.DataFrame(rows)
+
+def main():
+    """メイン関数"""
+    prices_file = PRICES_CSV
+    sentiment_file = "data_with_sentiment_scores_correct.csv"
+    output_file = "jump_threshold_sweep.csv"
+
+    print("=== ジャンプしきい値・ボラティリティ期間の感度分析 ===")
+    print(f"価格データ: {prices_file}")
+    print(f"センチメント: {sentiment_file}")
+    print(f"しきい値: {THRESHOLDS.min()}～{THRESHOLDS.max()}（{len(THRESHOLDS)} 通り）, 期間: {WINDOWS}")
+    require_prices_file(prices_file)
+
+    try:
+        sweep = JumpThresholdSweep(pd.read_csv(prices_file), pd.read_csv(sentiment_file))
+
+        start = time.perf_counter()
+        surface = sweep.run()
+        print(f"計算時間: {time.perf_counter() - start:.3f} 秒（{len(THRESHOLDS) * len(WINDOWS)} 通り）")
+
+        surface.to_csv(output_file, index=False, encoding='utf-8-sig')
+        print(f"結果を保存しました: {output_file}")
+
+        # センチメントのあるジャンプの割合（元の定義以外ではジャンプの一部しか測れない）
+        totals = surface.groupby(['window', 'threshold'])[['n_with_sentiment', 'n_jumps']].sum()
+        coverage = (totals['n_with_sentiment'] / totals['n_jumps']).unstack('threshold')
+        print(f"\n=== センチメントのあるジャンプの割合（行: 期間, 列: しきい値） ===")
+        print(coverage.to_string(float_format=lambda v: f"{v:.2f}"))
+
+        print(f"\n=== 資産ごとの相関（行: 期間, 列: しきい値） ===")
+        for asset, group in surface.groupby('asset'):
+            print(f"\n{asset}")
+            table = group.pivot(index='window', columns='threshold', values='corr')
+            print(table.to_string(float_format=lambda v: f"{v:.2f}"))
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
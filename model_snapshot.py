@@ -0,0 +1,139 @@
+import json
+import os
+import struct
+import sys
+import time
+import warnings
+from typing import Dict, Tuple
+
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification, BertJapaneseTokenizer
+
+# モデルスナップショットの保存先
+MODEL_SNAPSHOT_DIR = "model_snapshot"
+
+# safetensorsのdtype → (numpyのdtype, torchのdtype)
+_SAFETENSORS_DTYPES = {
+    "F32": (np.float32, torch.float32),
+    "F16": (np.float16, torch.float16),
+    "BF16": (np.int16, torch.bfloat16),  # numpyにbf16がないため同じ幅の整数で読み、torch側でviewする
+    "I64": (np.int64, torch.int64),
+    "I32": (np.int32, torch.int32),
+    "U8": (np.uint8, torch.uint8),
+}
+
+def has_snapshot(snapshot_dir: str = MODEL_SNAPSHOT_DIR) -> bool:
+    """スナップショットが作成済みか確認"""
+    return os.path.exists(os.path.join(snapshot_dir, "snapshot.json"))
+
+def create_model_snapshot(snapshot_dir: str = MODEL_SNAPSHOT_DIR) -> str:
+    """トークナイザーとモデルをローカルディレクトリに保存（重みはsafetensors形式）"""
+    from sentiment_analyzer_correct import TOKENIZER_NAME, MODEL_NAME
+
+    print(f"モデルスナップショットを作成中: {snapshot_dir}")
+    tokenizer = BertJapaneseTokenizer.from_pretrained(TOKENIZER_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+
+    tokenizer.save_pretrained(os.path.join(snapshot_dir, "tokenizer"))
+    model.save_pretrained(os.path.join(snapshot_dir, "model"), safe_serialization=True)
+
+    with open(os.path.join(snapshot_dir, "snapshot.json"), "w", encoding="utf-8") as f:
+        json.dump({'tokenizer': TOKENIZER_NAME, 'model': MODEL_NAME}, f, ensure_ascii=False, indent=2)
+
+    print(f"スナップショットの作成が完了しました: {snapshot_dir}")
+    return snapshot_dir
+
+def mmap_safetensors(path: str) -> Dict[str, torch.Tensor]:
+    """safetensorsファイルをメモリマップし、コピーせずにテンソルとして参照する"""
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    data_start = 8 + header_size
+
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        np_dtype, torch_dtype = _SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        array = mapped[data_start + begin:data_start + end].view(np_dtype).reshape(info["shape"])
+        # 読み取り専用のページキャッシュを共有するため書き込み不可のまま使う
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            tensor = torch.from_numpy(array)
+        if torch_dtype == torch.bfloat16:
+            tensor = tensor.view(torch.bfloat16)
+        tensors[name] = tensor
+    return tensors
+
+def load_model_from_snapshot(snapshot_dir: str = MODEL_SNAPSHOT_DIR):
+    """スナップショットから完全オフラインでモデルを読み込む（重みはメモリマップ）"""
+    model_dir = os.path.join(snapshot_dir, "model")
+    config = AutoConfig.from_pretrained(model_dir, local_files_only=True)
+
+    # 乱数による重みの初期化は不要（直後にメモリマップした重みで置き換える）
+    try:
+        from transformers.modeling_utils import no_init_weights
+        with no_init_weights():
+            model = AutoModelForSequenceClassification.from_config(config)
+    except ImportError:
+        model = AutoModelForSequenceClassification.from_config(config)
+
+    state_dict = mmap_safetensors(os.path.join(model_dir, "model.safetensors"))
+    result = model.load_state_dict(state_dict, strict=False, assign=True)
+    if result.missing_keys:
+        print(f"警告: スナップショットに含まれない重み: {result.missing_keys}")
+    model.eval()
+    return model
+
+def load_tokenizer_and_model(snapshot_dir: str = MODEL_SNAPSHOT_DIR) -> Tuple:
+    """スナップショットがあればそこから、なければHugging Face Hubから読み込む"""
+    from sentiment_analyzer_correct import TOKENIZER_NAME, MODEL_NAME
+
+    if has_snapshot(snapshot_dir):
+        tokenizer = BertJapaneseTokenizer.from_pretrained(
+            os.path.join(snapshot_dir, "tokenizer"), local_files_only=True
+        )
+        model = load_model_from_snapshot(snapshot_dir)
+        print(f"ローカルスナップショットから読み込みました: {snapshot_dir}")
+    else:
+        tokenizer = BertJapaneseTokenizer.from_pretrained(TOKENIZER_NAME)
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+        model.eval()
+    return tokenizer, model
+
+def main():
+    """メイン関数: スナップショットを作成してコールドスタート時間を比較"""
+    from sentiment_analyzer_correct import TOKENIZER_NAME, MODEL_NAME
+
+    print("=== モデルスナップショット作成ツール ===")
+    print(f"保存先: {MODEL_SNAPSHOT_DIR}")
+
+    try:
+        if not has_snapshot(MODEL_SNAPSHOT_DIR):
+            create_model_snapshot(MODEL_SNAPSHOT_DIR)
+        else:
+            print("スナップショットは作成済みです。")
+
+        start = time.perf_counter()
+        BertJapaneseTokenizer.from_pretrained(TOKENIZER_NAME)
+        AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+        hub_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        load_tokenizer_and_model(MODEL_SNAPSHOT_DIR)
+        snapshot_time = time.perf_counter() - start
+
+        print(f"\nHub経由の読み込み:         {hub_time:.2f} 秒")
+        print(f"スナップショットの読み込み: {snapshot_time:.2f} 秒 (x{hub_time / max(snapshot_time, 1e-9):.1f})")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import sys
+import unicodedata
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+# MinHashのハッシュ演算に使うメルセンヌ素数（2^31 - 1）
+MERSENNE_PRIME = (1 << 31) - 1
+FAILED_CONTENT = {"取得失敗", "解析失敗"}
+
+def normalize_text(text) -> str:
+    """全角/半角を揃え（NFKC）、空白を除いて小文字化"""
+    if pd.isna(text) or str(text).strip() in FAILED_CONTENT:
+        return ""
+    return "".join(unicodedata.normalize("NFKC", str(text)).lower().split())
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """文字 n-gram（シングル）ごとの多項式ハッシュを一括で計算"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) == 0:
+        return codes
+    if len(codes) < shingle_size:
+        shingle_size = len(codes)
+    powers = np.array([pow(257, shingle_size - 1 - j, MERSENNE_PRIME) for j in range(shingle_size)], dtype=np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(codes, shingle_size)
+    return np.unique((windows * powers).sum(axis=1) % MERSENNE_PRIME)
+
+class NearDuplicateDetector:
+    def __init__(self, num_perm: int = 128, bands: int = 32, shingle_size: int = 5,
+                 threshold: float = 0.7, seed: int = 0):
+        """MinHash署名とLSHで近似重複のテキストをクラスタリング
+
+        Args:
+            num_perm (int): MinHash署名の長さ
+            bands (int): LSHのバンド数（num_perm を割り切る値）
+            shingle_size (int): 文字シングルの長さ
+            threshold (float): 同じクラスタとみなす推定Jaccard類似度の下限
+            seed (int): ハッシュ関数の乱数シード
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm は bands で割り切れる必要があります")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """(テキスト数, num_perm) のMinHash署名（空のテキストは全て最大値）"""
+        signatures = np.full((len(texts), self.num_perm), MERSENNE_PRIME, dtype=np.uint32)
+        for i, text in enumerate(texts):
+            hashes = shingle_hashes(normalize_text(text), self.shingle_size)
+            if len(hashes):
+                # (a * x + b) mod p の各ハッシュ関数での最小値
+                signatures[i] = ((np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+        return signatures
+
+    def cluster(self, texts: List[str]) -> np.ndarray:
+        """クラスタの代表（最初に現れたテキスト）のインデックスを各テキストについて返す"""
+        signatures = self.signatures(texts)
+        empty = (signatures == MERSENNE_PRIME).all(axis=1)
+        parent = np.arange(len(texts))
+
+        def find(i):
+            root = i
+            while parent[root] != root:
+                root = parent[root]
+            while parent[i] != root:
+                parent[i], i = root, parent[i]
+            return root
+
+        # バンドごとにバケットへ振り分け、同じバケットの候補だけを比較（全ペア比較をしない）
+        for band in range(self.bands):
+            columns = slice(band * self.rows, (band + 1) * self.rows)
+            buckets: Dict[bytes, int] = {}
+            for i in np.flatnonzero(~empty):
+                key = signatures[i, columns].tobytes()
+                first = buckets.setdefault(key, i)
+                if first == i:
+                    continue
+                root_i, root_first = find(i), find(first)
+                if root_i == root_first:
+                    continue
+                if np.mean(signatures[i] == signatures[first]) >= self.threshold:
+                    parent[max(root_i, root_first)] = min(root_i, root_first)
+
+        return np.array([find(i) for i in range(len(texts))])
+
+def deduplicate_articles(detector: NearDuplicateDetector, articles_df: pd.DataFrame) -> pd.DataFrame:
+    """記事（タイトル + 本文）を近似重複でクラスタリングし、cluster_id と is_representative 列を追加"""
+    texts = (articles_df['title'].fillna('').astype(str) + "\n" +
+             articles_df['content'].fillna('').astype(str)).tolist()
+    clusters = detector.cluster(texts)
+    result = articles_df.copy()
+    result['cluster_id'] = clusters
+    result['is_representative'] = clusters == np.arange(len(clusters))
+    return result
+
+def score_titles_by_cluster(analyzer, detector: NearDuplicateDetector, titles: List[str],
+                            batch_size: int = 32) -> np.ndarray:
+    """近似重複のタイトルはクラスタの代表だけをスコアリングし、同じスコアを割り当てる"""
+    clusters = detector.cluster(titles)
+    representatives = np.unique(clusters)
+    scores = np.zeros(len(titles))
+    if len(representatives):
+        probs = analyzer.predict_probabilities([titles[i] for i in representatives], batch_size=batch_size)
+        representative_scores = dict(zip(representatives.tolist(), (probs[:, 2] - probs[:, 1]).tolist()))
+        scores = np.array([representative_scores[c] for c in clusters.tolist()])
+    return scores
+
+def summarize_clusters(deduplicated_df: pd.DataFrame) -> Dict[str, Any]:
+    """クラスタリング結果の統計"""
+    sizes = deduplicated_df.groupby('cluster_id').size()
+    return {
+        'articles': len(deduplicated_df),
+        'clusters': len(sizes),
+        'duplicate_articles': int(len(deduplicated_df) - len(sizes)),
+        'largest_cluster': int(sizes.max()) if len(sizes) else 0,
+    }
+
+def main():
+    """メイン関数"""
+    input_file = "bloomberg_articles.csv"
+    output_file = "bloomberg_articles_dedup.csv"
+    clusters_file = "bloomberg_article_clusters.csv"
+
+    print("=== MinHash/LSH による近似重複記事の検出 ===")
+    print(f"入力ファイル: {input_file}")
+
+    try:
+        detector = NearDuplicateDetector()
+        articles_df = pd.read_csv(input_file)
+        result = deduplicate_articles(detector, articles_df)
+
+        stats = summarize_clusters(result)
+        print(f"記事数: {stats['articles']} / クラスタ数: {stats['clusters']}")
+        print(f"近似重複として除外できる記事: {stats['duplicate_articles']}（最大クラスタ: {stats['largest_cluster']} 件）")
+
+        result[['date', 'bloomberg_url', 'title', 'cluster_id', 'is_representative']].to_csv(
+            clusters_file, index=False, encoding='utf-8-sig'
+        )
+        result[result['is_representative']].drop(columns=['cluster_id', 'is_representative']).to_csv(
+            output_file, index=False, encoding='utf-8-sig'
+        )
+        print(f"クラスタ情報を保存しました: {clusters_file}")
+        print(f"代表記事のみのCSVを保存しました: {output_file}")
+
+        # 代表記事の例を表示
+        for cluster_id, group in result.groupby('cluster_id'):
+            if len(group) > 1:
+                print(f"\n重複クラスタの例（{len(group)} 件）:")
+                for title in group['title'].head(3):
+                    print(f"  - {title}")
+                break
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
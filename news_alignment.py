@@ -0,0 +1,147 @@
+import sys
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 資産ごとの取引時間（タイムゾーンと終了時刻）
+MARKET_SESSIONS = {
+    'NKY Index': ('Asia/Tokyo', '15:00'),
+    'SPX Index': ('America/New_York', '16:00'),
+    'USDJPY Curncy': ('America/New_York', '17:00'),
+    'USGG10YR Index': ('America/New_York', '17:00'),
+}
+DEFAULT_SESSION = ('Asia/Tokyo', '15:00')
+
+def parse_article_dates(article_dates: pd.Series) -> pd.Series:
+    """「2022年1月19日 8:57 JST」形式の日時をUTCのTimestampに変換（解析できなければ NaT）"""
+    parts = article_dates.astype(str).str.extract(r'(\d{4})年(\d{1,2})月(\d{1,2})日\s*(\d{1,2}):(\d{2})')
+    parts = parts.astype(float)
+    timestamps = pd.to_datetime(pd.DataFrame({
+        'year': parts[0], 'month': parts[1], 'day': parts[2], 'hour': parts[3], 'minute': parts[4],
+    }), errors='coerce')
+    return timestamps.dt.tz_localize('Asia/Tokyo').dt.tz_convert('UTC')
+
+def session_calendar(asset: str, start, end, trading_dates=None) -> pd.DataFrame:
+    """資産の取引日と各取引日の終了時刻（UTC）
+
+    trading_dates を渡さない場合は土日を除く営業日（祝日は考慮しない）とする。
+    """
+    tz, close = MARKET_SESSIONS.get(asset, DEFAULT_SESSION)
+    if trading_dates is None:
+        trading_dates = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize())
+    dates = pd.DatetimeIndex(pd.to_datetime(trading_dates)).normalize().unique().sort_values()
+    closes = (dates + pd.Timedelta(close + ':00')).tz_localize(tz).tz_convert('UTC')
+    return pd.DataFrame({'asset': asset, 'session_date': dates.strftime('%Y-%m-%d'), 'session_close': closes})
+
+def build_calendars(assets, published: pd.Series, trading_dates: Dict[str, list] = None) -> pd.DataFrame:
+    """全資産の取引カレンダーを1つの表にまとめる（記事の期間を少し広げて作成）"""
+    start = published.min().tz_convert(None) - pd.Timedelta(days=7)
+    end = published.max().tz_convert(None) + pd.Timedelta(days=7)
+    trading_dates = trading_dates or {}
+    return pd.concat([session_calendar(asset, start, end, trading_dates.get(asset)) for asset in assets],
+                     ignore_index=True)
+
+def align_to_next_session(articles: pd.DataFrame, calendars: pd.DataFrame) -> pd.DataFrame:
+    """各記事を、資産ごとに公開時刻以降で最初に終了する取引セッションに割り当てる（merge_asof）
+
+    Returns:
+        pd.DataFrame: 記事 × 資産の行（asset, session_date, session_close 列を追加）
+    """
+    assets = calendars['asset'].unique()
+    stacked = pd.concat([articles.assign(asset=asset) for asset in assets], ignore_index=True)
+    stacked = stacked.dropna(subset=['published']).sort_values('published', kind='stable')
+    aligned = pd.merge_asof(
+        stacked, calendars.sort_values('session_close'),
+        left_on='published', right_on='session_close', by='asset', direction='forward'
+    )
+    return aligned.dropna(subset=['session_close'])
+
+def lookback_links(row_times: np.ndarray, article_times: np.ndarray, lookback: pd.Timedelta) -> Tuple[np.ndarray, np.ndarray]:
+    """各行の時刻から lookback だけ遡った区間 (t - lookback, t] に公開された記事を二分探索で求める
+
+    Args:
+        row_times: 行ごとの基準時刻（datetime64）
+        article_times: 記事の公開時刻（datetime64、昇順に並べたもの）
+        lookback: 遡る期間
+
+    Returns:
+        (行番号, 記事番号) の配列の組
+    """
+    start = np.searchsorted(article_times, row_times - np.timedelta64(lookback), side='right')
+    end = np.searchsorted(article_times, row_times, side='right')
+    counts = end - start
+    row_ids = np.repeat(np.arange(len(row_times)), counts)
+    # 各行の記事番号 start..end-1 を連結（ループなし）
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    article_ids = np.repeat(start, counts) + offsets
+    return row_ids, article_ids
+
+def add_aligned_titles(original_df: pd.DataFrame, articles_df: pd.DataFrame,
+                       lookback_hours: float = None, trading_dates: Dict[str, list] = None) -> pd.DataFrame:
+    """add_titles_to_original_csv の時刻ベース版
+
+    lookback_hours を指定しない場合は、各記事を資産ごとの次の取引セッションに割り当てる。
+    指定した場合は、各行のセッション終了時刻から lookback_hours 時間前までに公開された記事を付与する。
+    """
+    articles = articles_df.copy()
+    articles['published'] = parse_article_dates(articles['article_date'])
+    articles = articles.dropna(subset=['published']).drop_duplicates('bloomberg_url')
+    articles = articles[~articles['title'].isin(['取得失敗', '解析失敗'])]
+    assets = original_df['asset'].unique()
+    calendars = build_calendars(assets, articles['published'], trading_dates)
+
+    result = original_df.copy()
+    if lookback_hours is None:
+        aligned = align_to_next_session(articles[['title', 'published']], calendars)
+        titles = aligned.groupby(['asset', 'session_date'])['title'].agg(' | '.join)
+        keys = pd.MultiIndex.from_arrays([result['asset'], result['date']])
+        result['news_titles'] = titles.reindex(keys).fillna('記事なし').to_numpy()
+        return result
+
+    # 行ごとのセッション終了時刻（カレンダーと同じ定義）から遡る
+    closes = result[['asset', 'date']].merge(
+        calendars.rename(columns={'session_date': 'date'}), on=['asset', 'date'], how='left'
+    )['session_close']
+    articles = articles.sort_values('published')
+    article_times = articles['published'].dt.tz_convert(None).to_numpy()
+    valid = closes.notna().to_numpy()
+    row_times = closes[valid].dt.tz_convert(None).to_numpy()
+
+    row_ids, article_ids = lookback_links(row_times, article_times, pd.Timedelta(hours=lookback_hours))
+    links = pd.DataFrame({'row': np.flatnonzero(valid)[row_ids], 'title': articles['title'].to_numpy()[article_ids]})
+    titles = links.groupby('row')['title'].agg(' | '.join)
+    result['news_titles'] = titles.reindex(np.arange(len(result))).fillna('記事なし').to_numpy()
+    return result
+
+def main():
+    """メイン関数"""
+    original_csv = "data.csv"
+    articles_csv = "bloomberg_articles.csv"
+    output_csv = "data_with_aligned_news_titles.csv"
+    lookback_hours = None  # 例: 24 で各セッション終了前24時間の記事を付与
+
+    print("=== ニュースと取引セッションの時刻合わせ ===")
+    print(f"元のCSV: {original_csv}")
+    print(f"記事データ: {articles_csv}")
+    print(f"出力ファイル: {output_csv}")
+    print(f"割り当て方法: {'次の取引セッション' if lookback_hours is None else f'セッション終了前 {lookback_hours} 時間'}")
+
+    try:
+        original_df = pd.read_csv(original_csv)
+        articles_df = pd.read_csv(articles_csv)
+        result = add_aligned_titles(original_df, articles_df, lookback_hours)
+        result.to_csv(output_csv, index=False, encoding='utf-8-sig')
+
+        matched = (result['news_titles'] != '記事なし').sum()
+        print(f"ニュースが割り当てられた行: {matched} / {len(result)}")
+        print(f"補完完了: {output_csv}")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
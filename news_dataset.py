@@ -0,0 +1,136 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# 正規化したデータセットの保存先
+NEWS_DATASET_DIR = "news_dataset"
+FAILED_TITLES = {"取得失敗", "解析失敗"}
+
+def build_news_dataset(original_csv_path: str, articles_csv_path: str,
+                       dataset_dir: str = NEWS_DATASET_DIR) -> str:
+    """data.csv と記事CSVから、記事表・日付↔記事の対応表・資産行の表を作成
+
+    - articles.csv: article_id, bloomberg_url, title, author, content, article_date
+    - date_articles.csv: date, article_id
+    - asset_rows.csv: row_id と data.csv の列（news_titles のような結合文字列は持たない）
+    """
+    original_df = pd.read_csv(original_csv_path)
+    articles_df = pd.read_csv(articles_csv_path)
+
+    # 取得に失敗した記事は含めない。同じURLの記事は1件にまとめる
+    articles_df = articles_df[~articles_df['title'].isin(FAILED_TITLES) & articles_df['title'].notna()]
+    articles = articles_df.drop_duplicates('bloomberg_url').drop(columns=['date']).reset_index(drop=True)
+    articles.insert(0, 'article_id', np.arange(len(articles), dtype=np.int32))
+
+    url_to_id = dict(zip(articles['bloomberg_url'], articles['article_id']))
+    date_articles = pd.DataFrame({
+        'date': articles_df['date'].values,
+        'article_id': articles_df['bloomberg_url'].map(url_to_id).values,
+    }).drop_duplicates()
+
+    asset_rows = original_df.drop(columns=['news_titles'], errors='ignore')
+    asset_rows.insert(0, 'row_id', np.arange(len(asset_rows), dtype=np.int32))
+
+    os.makedirs(dataset_dir, exist_ok=True)
+    articles.to_csv(os.path.join(dataset_dir, "articles.csv"), index=False, encoding='utf-8-sig')
+    date_articles.to_csv(os.path.join(dataset_dir, "date_articles.csv"), index=False, encoding='utf-8-sig')
+    asset_rows.to_csv(os.path.join(dataset_dir, "asset_rows.csv"), index=False, encoding='utf-8-sig')
+    return dataset_dir
+
+class NewsDataset:
+    def __init__(self, dataset_dir: str = NEWS_DATASET_DIR):
+        """正規化したデータセットを読み込み、結合で各段階の入力を作る"""
+        self.dataset_dir = dataset_dir
+        self.articles = pd.read_csv(os.path.join(dataset_dir, "articles.csv"))
+        self.date_articles = pd.read_csv(os.path.join(dataset_dir, "date_articles.csv"),
+                                         dtype={'date': str, 'article_id': np.int32})
+        self.asset_rows = pd.read_csv(os.path.join(dataset_dir, "asset_rows.csv"))
+
+    def row_articles(self) -> pd.DataFrame:
+        """資産行 × その日付の記事（row_id, article_id）"""
+        return self.asset_rows[['row_id', 'date']].merge(
+            self.date_articles, on='date', how='inner'
+        )[['row_id', 'article_id']]
+
+    def score_articles(self, analyzer, batch_size: int = 32) -> pd.DataFrame:
+        """記事ごとにタイトルを1回だけスコアリングし、記事の特徴量として articles に列を追加"""
+        titles = self.articles['title'].astype(str).str.strip().tolist()
+        probabilities = np.zeros((len(titles), 3), dtype=np.float32)
+        for start in range(0, len(titles), batch_size):
+            probs = analyzer.predict_probabilities(titles[start:start + batch_size], batch_size=batch_size)
+            probabilities[start:start + batch_size] = np.asarray(probs)
+
+        self.articles['neutral'] = probabilities[:, 0]
+        self.articles['negative'] = probabilities[:, 1]
+        self.articles['positive'] = probabilities[:, 2]
+        self.articles['sentiment_score'] = probabilities[:, 2] - probabilities[:, 1]
+        return self.articles
+
+    def row_sentiment(self, threshold: float = 0.1) -> pd.DataFrame:
+        """資産行ごとの集計値（summarize_scores と同じ列）を結合と groupby で計算"""
+        if 'sentiment_score' not in self.articles.columns:
+            raise ValueError("記事のスコアがありません（先に score_articles を実行してください）")
+        joined = self.row_articles().merge(self.articles[['article_id', 'sentiment_score']], on='article_id')
+        score = joined['sentiment_score']
+        grouped = joined.assign(
+            positive_count=(score > threshold).astype(int),
+            negative_count=(score < -threshold).astype(int),
+        ).groupby('row_id').agg(
+            avg_sentiment_score=('sentiment_score', 'mean'),
+            positive_count=('positive_count', 'sum'),
+            negative_count=('negative_count', 'sum'),
+            total_titles=('sentiment_score', 'size'),
+        )
+
+        summary = grouped.reindex(self.asset_rows['row_id'])
+        summary = summary.fillna({'avg_sentiment_score': 0.0, 'positive_count': 0,
+                                  'negative_count': 0, 'total_titles': 0})
+        summary = summary.astype({'positive_count': int, 'negative_count': int, 'total_titles': int})
+        summary['neutral_count'] = summary['total_titles'] - summary['positive_count'] - summary['negative_count']
+        summary = summary[['avg_sentiment_score', 'positive_count', 'negative_count', 'neutral_count', 'total_titles']]
+        return self.asset_rows.merge(summary.reset_index(), on='row_id')
+
+    def news_titles(self) -> pd.Series:
+        """互換用: 旧形式の ' | ' 結合文字列（row_id 順）"""
+        joined = self.row_articles().merge(self.articles[['article_id', 'title']], on='article_id')
+        titles = joined.groupby('row_id')['title'].agg(' | '.join)
+        return titles.reindex(self.asset_rows['row_id']).fillna('記事なし').reset_index(drop=True)
+
+def main():
+    """メイン関数: 正規化したデータセットを作成し、結合ベースでセンチメントを集計"""
+    from sentiment_analyzer_correct import CorrectSentimentAnalyzer
+
+    original_csv = "data.csv"
+    articles_csv = "bloomberg_articles.csv"
+    output_file = "data_with_sentiment_scores_normalized.csv"
+
+    print("=== 正規化ニュースデータセット ===")
+    print(f"元のCSV: {original_csv}")
+    print(f"記事データ: {articles_csv}")
+    print(f"保存先: {NEWS_DATASET_DIR}")
+
+    try:
+        build_news_dataset(original_csv, articles_csv)
+        dataset = NewsDataset()
+        print(f"記事: {len(dataset.articles)} 件 / 日付↔記事: {len(dataset.date_articles)} 件 / "
+              f"資産行: {len(dataset.asset_rows)} 行")
+
+        analyzer = CorrectSentimentAnalyzer(use_server=True)
+        dataset.score_articles(analyzer)
+        dataset.articles.to_csv(os.path.join(NEWS_DATASET_DIR, "articles.csv"), index=False, encoding='utf-8-sig')
+
+        result_df = dataset.row_sentiment().drop(columns=['row_id'])
+        result_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        print(f"結果を保存しました: {output_file}")
+        print(f"平均センチメントスコア: {result_df['avg_sentiment_score'].mean():.4f}")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Dict, Any
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, BertJapaneseTokenizer
+
+from sentiment_analyzer_correct import (
+    CorrectSentimentAnalyzer,
+    TOKENIZER_NAME,
+    MODEL_NAME,
+    load_news_titles,
+)
+
+# ONNXモデルの保存先
+ONNX_MODEL_DIR = "bert_sentiment_onnx"
+ONNX_MODEL_PATH = os.path.join(ONNX_MODEL_DIR, "model.onnx")
+
+# PyTorchとの確率出力の許容誤差（絶対誤差）
+PROBABILITY_TOLERANCE = 1e-4
+
+def export_onnx_model(output_path: str = ONNX_MODEL_PATH, opset_version: int = 14) -> str:
+    """感情分析モデルをONNX形式で書き出す"""
+    print(f"ONNXモデルを書き出し中: {output_path}")
+    tokenizer = BertJapaneseTokenizer.from_pretrained(TOKENIZER_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+    model.eval()
+
+    # ダミー入力（バッチサイズと系列長は可変にする）
+    dummy = tokenizer(["テストの結果が良くてうれしい。"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            output_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset_version,
+        )
+    print(f"ONNXモデルの書き出しが完了しました: {output_path}")
+    return output_path
+
+class OnnxSentimentModel:
+    def __init__(self, onnx_path: str = ONNX_MODEL_PATH, num_threads: int = 0):
+        """ONNX Runtimeの推論セッションを作成
+
+        Args:
+            onnx_path (str): ONNXモデルのパス
+            num_threads (int): intra-opスレッド数（0はONNX Runtimeの既定値）
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            print("onnxruntime がインストールされていません: pip install onnxruntime")
+            raise
+
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"ONNXモデルが見つかりません: {onnx_path}（先に onnx_backend.py を実行してください）")
+
+        options = ort.SessionOptions()
+        # グラフ最適化（演算子融合など）をすべて有効化
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            onnx_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, **inputs) -> SimpleNamespace:
+        """PyTorchモデルと同じく .logits を持つ結果を返す"""
+        feeds = {
+            name: inputs[name].cpu().numpy().astype(np.int64)
+            for name in self.input_names if name in inputs
+        }
+        logits = self.session.run(["logits"], feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+def verify_onnx_outputs(pytorch_analyzer: CorrectSentimentAnalyzer,
+                        onnx_analyzer: CorrectSentimentAnalyzer,
+                        texts: List[str],
+                        tolerance: float = PROBABILITY_TOLERANCE) -> float:
+    """PyTorchとONNX Runtimeの確率出力の最大絶対誤差を確認"""
+    expected = pytorch_analyzer.predict_probabilities(texts)
+    actual = onnx_analyzer.predict_probabilities(texts)
+    max_diff = float((expected - actual).abs().max()) if len(texts) else 0.0
+
+    status = "OK" if max_diff <= tolerance else "NG"
+    print(f"確率出力の最大絶対誤差: {max_diff:.2e} (許容誤差: {tolerance:.0e}) [{status}]")
+    return max_diff
+
+def measure_throughput(analyzer: CorrectSentimentAnalyzer, texts: List[str],
+                       batch_size: int = 32) -> Dict[str, Any]:
+    """タイトルのスループット（件/秒）を計測"""
+    # ウォームアップ
+    analyzer.predict_probabilities(texts[:batch_size], batch_size=batch_size)
+
+    start = time.perf_counter()
+    analyzer.predict_probabilities(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'backend': analyzer.backend,
+        'titles': len(texts),
+        'seconds': elapsed,
+        'titles_per_sec': len(texts) / elapsed if elapsed > 0 else 0.0
+    }
+
+def main():
+    """メイン関数"""
+    input_file = "data_with_news_titles.csv"
+    batch_size = 32
+
+    print("=== ONNX Runtime 推論バックエンド ===")
+    print(f"ONNXモデル: {ONNX_MODEL_PATH}")
+    print(f"ヘッドラインコーパス: {input_file}")
+
+    try:
+        # ONNXモデルは一度だけ書き出してローカルに保存
+        if not os.path.exists(ONNX_MODEL_PATH):
+            export_onnx_model(ONNX_MODEL_PATH)
+        else:
+            print(f"既存のONNXモデルを使用します: {ONNX_MODEL_PATH}")
+
+        titles = load_news_titles(input_file)
+        print(f"ユニークなタイトル数: {len(titles)}")
+
+        pytorch_analyzer = CorrectSentimentAnalyzer(backend="pytorch")
+        onnx_analyzer = CorrectSentimentAnalyzer(backend="onnx")
+
+        print("\n=== 出力の一致確認 ===")
+        verify_onnx_outputs(pytorch_analyzer, onnx_analyzer, titles)
+
+        print("\n=== スループット比較 ===")
+        results = [
+            measure_throughput(pytorch_analyzer, titles, batch_size),
+            measure_throughput(onnx_analyzer, titles, batch_size),
+        ]
+        for result in results:
+            print(f"  {result['backend']:8s}: {result['titles_per_sec']:8.1f} 件/秒 "
+                  f"({result['titles']} 件, {result['seconds']:.2f} 秒)")
+
+        speedup = results[1]['titles_per_sec'] / results[0]['titles_per_sec']
+        print(f"\nONNX Runtime の速度比: {speedup:.2f} 倍")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
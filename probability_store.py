@@ -0,0 +1,171 @@
+import json
+import os
+import sys
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+# 確率ストアの保存先
+PROBABILITY_STORE_DIR = "probability_store"
+
+def build_probability_store(analyzer, news_titles, store_dir: str = PROBABILITY_STORE_DIR,
+                            batch_size: int = 32) -> str:
+    """各行のタイトルを一度だけ推論し、タイトルごとの確率と行→タイトルIDの対応を保存
+
+    Args:
+        analyzer: predict_probabilities を持つ分析器（CorrectSentimentAnalyzer など）
+        news_titles: 行ごとの news_titles（| 区切りの文字列）
+        store_dir (str): 保存先ディレクトリ
+        batch_size (int): 推論のバッチサイズ
+    """
+    from sentiment_analyzer_correct import split_news_titles
+
+    title_ids: Dict[str, int] = {}
+    row_title_ids = []
+    row_offsets = [0]
+    for value in news_titles:
+        for title in split_news_titles(value):
+            row_title_ids.append(title_ids.setdefault(title, len(title_ids)))
+        row_offsets.append(len(row_title_ids))
+
+    titles = list(title_ids)
+    probabilities = np.zeros((len(titles), 3), dtype=np.float16)
+    for start in range(0, len(titles), batch_size):
+        probs = analyzer.predict_probabilities(titles[start:start + batch_size], batch_size=batch_size)
+        probabilities[start:start + batch_size] = np.asarray(probs)
+
+    os.makedirs(store_dir, exist_ok=True)
+    np.save(os.path.join(store_dir, "probabilities.npy"), probabilities)
+    np.save(os.path.join(store_dir, "row_title_ids.npy"), np.array(row_title_ids, dtype=np.int32))
+    np.save(os.path.join(store_dir, "row_offsets.npy"), np.array(row_offsets, dtype=np.int64))
+    with open(os.path.join(store_dir, "titles.json"), "w", encoding="utf-8") as f:
+        json.dump(titles, f, ensure_ascii=False)
+    return store_dir
+
+class ProbabilityStore:
+    def __init__(self, store_dir: str = PROBABILITY_STORE_DIR):
+        """タイトルごとの [neutral, negative, positive] 確率（float16）を読み込み、推論なしで集計値を再計算
+
+        Args:
+            store_dir (str): build_probability_store の保存先
+        """
+        self.store_dir = store_dir
+        self.probabilities = np.load(os.path.join(store_dir, "probabilities.npy"), mmap_mode="r")
+        self.row_title_ids = np.load(os.path.join(store_dir, "row_title_ids.npy"), mmap_mode="r")
+        self.row_offsets = np.load(os.path.join(store_dir, "row_offsets.npy"))
+        with open(os.path.join(store_dir, "titles.json"), encoding="utf-8") as f:
+            self.titles = json.load(f)
+
+        # 行ごとのタイトル数と、タイトル出現ごとの行番号・スコア（positive - negative）
+        self.row_counts = np.diff(self.row_offsets)
+        self.occurrence_rows = np.repeat(np.arange(len(self.row_counts)), self.row_counts)
+        title_scores = self.title_scores()
+        self.occurrence_scores = title_scores[np.asarray(self.row_title_ids)]
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.row_counts)
+
+    def title_scores(self) -> np.ndarray:
+        """タイトルIDごとのスコア（positive - negative）"""
+        probabilities = np.asarray(self.probabilities, dtype=np.float32)
+        return probabilities[:, 2] - probabilities[:, 1]
+
+    def _row_sum(self, values: np.ndarray) -> np.ndarray:
+        return np.bincount(self.occurrence_rows, weights=values, minlength=self.num_rows)
+
+    def mean(self) -> np.ndarray:
+        """行ごとの平均スコア（タイトルのない行は 0.0）"""
+        sums = self._row_sum(self.occurrence_scores)
+        return np.divide(sums, self.row_counts, out=np.zeros(self.num_rows), where=self.row_counts > 0)
+
+    def trimmed_mean(self, proportion: float = 0.1) -> np.ndarray:
+        """行ごとに上下 proportion の割合のスコアを除いた平均"""
+        order = np.lexsort((self.occurrence_scores, self.occurrence_rows))
+        sorted_scores = self.occurrence_scores[order]
+        rows = self.occurrence_rows[order]
+        rank = np.arange(len(sorted_scores)) - self.row_offsets[rows]
+        cut = np.floor(self.row_counts * proportion).astype(np.int64)
+        keep = (rank >= cut[rows]) & (rank < (self.row_counts - cut)[rows])
+
+        sums = np.bincount(rows[keep], weights=sorted_scores[keep], minlength=self.num_rows)
+        counts = np.bincount(rows[keep], minlength=self.num_rows)
+        return np.divide(sums, counts, out=np.zeros(self.num_rows), where=counts > 0)
+
+    def counts(self, threshold: float = 0.1) -> Dict[str, np.ndarray]:
+        """行ごとの positive / negative / neutral の件数（しきい値は任意）"""
+        positive = self._row_sum(self.occurrence_scores > threshold).astype(np.int64)
+        negative = self._row_sum(self.occurrence_scores < -threshold).astype(np.int64)
+        return {
+            'positive_count': positive,
+            'negative_count': negative,
+            'neutral_count': self.row_counts - positive - negative,
+        }
+
+    def summarize(self, threshold: float = 0.1) -> pd.DataFrame:
+        """summarize_scores と同じ列の集計表"""
+        summary = pd.DataFrame({'avg_sentiment_score': self.mean()})
+        for name, values in self.counts(threshold).items():
+            summary[name] = values
+        summary['total_titles'] = self.row_counts
+        return summary
+
+    def row_details(self, row: int) -> List[Dict[str, Any]]:
+        """行に含まれる各タイトルの確率（ドリルダウン用）"""
+        details = []
+        for title_id in self.row_title_ids[self.row_offsets[row]:self.row_offsets[row + 1]]:
+            neutral, negative, positive = self.probabilities[title_id].astype(float)
+            details.append({
+                'title': self.titles[title_id],
+                'neutral': neutral,
+                'negative': negative,
+                'positive': positive,
+                'sentiment_score': positive - negative,
+            })
+        return details
+
+def main():
+    """メイン関数: 確率ストアを作成し、しきい値や集計方法を変えた集計を推論なしで比較"""
+    from sentiment_analyzer_correct import CorrectSentimentAnalyzer
+
+    input_file = "data_with_news_titles.csv"
+    output_file = "data_with_sentiment_scores_store.csv"
+
+    print("=== タイトル別確率ストア ===")
+    print(f"入力ファイル: {input_file}")
+    print(f"保存先: {PROBABILITY_STORE_DIR}")
+
+    try:
+        df = pd.read_csv(input_file)
+        analyzer = CorrectSentimentAnalyzer(use_server=True)
+        build_probability_store(analyzer, df['news_titles'])
+
+        store = ProbabilityStore()
+        print(f"行数: {store.num_rows} / ユニークなタイトル数: {len(store.titles)}")
+        print(f"確率配列のサイズ: {store.probabilities.nbytes / 1024:.1f} KB (float16)")
+
+        result_df = pd.concat([df, store.summarize()], axis=1)
+        result_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        print(f"結果を保存しました: {output_file}")
+
+        print(f"\n=== 推論なしでの再集計 ===")
+        print(f"平均スコア: {store.mean().mean():.4f} / 10%トリム平均: {store.trimmed_mean(0.1).mean():.4f}")
+        for threshold in (0.1, 0.3, 0.5):
+            counts = store.counts(threshold)
+            print(f"しきい値 {threshold}: ポジティブ {counts['positive_count'].sum()}, "
+                  f"ネガティブ {counts['negative_count'].sum()}, 中立 {counts['neutral_count'].sum()}")
+
+        if store.num_rows and store.row_counts[0]:
+            print(f"\n先頭行のタイトル別確率:")
+            for detail in store.row_details(0):
+                print(f"  {detail['sentiment_score']:+.3f} {detail['title']}")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import io
+import sys
+import time
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+import torch
+from scipy.stats import pearsonr
+
+from sentiment_analyzer_correct import CorrectSentimentAnalyzer, bf16_supported, split_news_titles
+
+def model_memory_mb(model) -> float:
+    """モデルの重みのサイズ（MB）をシリアライズ後のバイト数で計測"""
+    # 量子化済みの線形層はパラメータではなくパック済みの重みを持つため、state_dictで数える
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+def score_dataset(analyzer: CorrectSentimentAnalyzer, df: pd.DataFrame,
+                  batch_size: int = 32) -> Dict[str, Any]:
+    """全タイトルを推論し、行ごとの avg_sentiment_score とスループットを返す"""
+    row_titles = [split_news_titles(v) for v in df['news_titles']]
+    unique_titles = list(dict.fromkeys(t for titles in row_titles for t in titles))
+
+    # ウォームアップ
+    analyzer.predict_probabilities(unique_titles[:batch_size], batch_size=batch_size)
+
+    start = time.perf_counter()
+    probs = analyzer.predict_probabilities(unique_titles, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    title_scores = (probs[:, 2] - probs[:, 1]).numpy()
+    score_by_title = dict(zip(unique_titles, title_scores))
+    avg_scores = np.array([
+        np.mean([score_by_title[t] for t in titles]) if titles else 0.0
+        for titles in row_titles
+    ])
+
+    return {
+        'title_scores': title_scores,
+        'avg_sentiment_score': avg_scores,
+        'titles': len(unique_titles),
+        'titles_per_sec': len(unique_titles) / elapsed if elapsed > 0 else 0.0
+    }
+
+def classify(scores: np.ndarray) -> np.ndarray:
+    """ポジティブ(1)・ネガティブ(-1)・中立(0)に分類（しきい値 ±0.1）"""
+    return np.where(scores > 0.1, 1, np.where(scores < -0.1, -1, 0))
+
+def compare_precisions(input_file: str, precisions: List[str], batch_size: int = 32) -> pd.DataFrame:
+    """fp32と量子化モードで同じデータをスコアリングし、速度と精度を比較"""
+    df = pd.read_csv(input_file)
+    print(f"データ行数: {len(df)}")
+
+    results = {}
+    report = []
+    for precision in precisions:
+        print(f"\n--- 推論精度: {precision} ---")
+        analyzer = CorrectSentimentAnalyzer(backend="pytorch", precision=precision)
+        result = score_dataset(analyzer, df, batch_size)
+        result['memory_mb'] = model_memory_mb(analyzer.model)
+        results[precision] = result
+        print(f"  スループット: {result['titles_per_sec']:.1f} 件/秒 ({result['titles']} 件)")
+        print(f"  モデルサイズ: {result['memory_mb']:.1f} MB")
+        del analyzer
+
+    reference = results[precisions[0]]
+    for precision in precisions:
+        result = results[precision]
+        row = {
+            'precision': precision,
+            'titles_per_sec': result['titles_per_sec'],
+            'speedup': result['titles_per_sec'] / reference['titles_per_sec'],
+            'memory_mb': result['memory_mb'],
+            # タイトル単位の分類一致率
+            'label_agreement': float(np.mean(classify(result['title_scores']) == classify(reference['title_scores']))),
+            'max_abs_diff': float(np.max(np.abs(result['avg_sentiment_score'] - reference['avg_sentiment_score']))),
+        }
+        # 行単位の avg_sentiment_score の相関
+        if precision == precisions[0]:
+            row['avg_score_corr'] = 1.0
+        else:
+            row['avg_score_corr'] = pearsonr(result['avg_sentiment_score'], reference['avg_sentiment_score'])[0]
+        report.append(row)
+
+    return pd.DataFrame(report)
+
+def main():
+    """メイン関数"""
+    input_file = "data_with_news_titles.csv"
+    precisions = ["fp32", "int8"]
+    if bf16_supported():
+        precisions.append("bf16")
+
+    print("=== 量子化推論の精度・速度評価ツール ===")
+    print(f"入力ファイル: {input_file}")
+    print(f"比較する推論精度: {', '.join(precisions)}")
+
+    try:
+        report = compare_precisions(input_file, precisions)
+
+        print(f"\n=== 評価結果（基準: {precisions[0]}）===")
+        for _, row in report.iterrows():
+            print(f"{row['precision']:5s}: {row['titles_per_sec']:8.1f} 件/秒 (x{row['speedup']:.2f}), "
+                  f"モデル {row['memory_mb']:6.1f} MB, "
+                  f"分類一致率 {row['label_agreement']*100:5.1f}%, "
+                  f"avg_sentiment_score 相関 {row['avg_score_corr']:.4f}, "
+                  f"最大差 {row['max_abs_diff']:.4f}")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+import sys
+import time
+from itertools import product
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# 既定の回帰の組み合わせ
+DEPENDENT_VARIABLES = ['ret', 'jump_width']
+SENTIMENT_SETS = [
+    ['avg_sentiment_score'],
+    ['positive_count', 'negative_count'],
+]
+CONTROL_SETS = [
+    [],
+    ['sigma'],
+]
+SENTIMENT_LAGS = [0, 1, 2]
+
+def add_lagged_features(df: pd.DataFrame, features: List[str], lags: List[int], group_column: str = 'asset') -> pd.DataFrame:
+    """資産ごとに1つ前・2つ前の観測（行）のセンチメントを列として追加（列名: <列>_lag<k>）"""
+    df = df.sort_values([group_column, 'date'], kind='stable').reset_index(drop=True)
+    grouped = df.groupby(group_column, sort=False)
+    for feature in features:
+        for lag in lags:
+            if lag > 0:
+                df[f'{feature}_lag{lag}'] = grouped[feature].shift(lag)
+    return df
+
+def batched_ols(X: np.ndarray, y: np.ndarray, mask: np.ndarray, num_params: np.ndarray) -> Dict[str, np.ndarray]:
+    """パディングした計画行列をまとめて最小二乗推定
+
+    Args:
+        X: (仕様数, 最大行数, 最大係数数) の計画行列（無効行・未使用の列は0）
+        y: (仕様数, 最大行数) の従属変数（無効行は0）
+        mask: (仕様数, 最大行数) の有効行マスク
+        num_params (np.ndarray): 仕様ごとの係数の数（定数項を含む）
+
+    Returns:
+        dict: coef, se（HC1の頑健標準誤差）, r2, adj_r2, n
+    """
+    w = mask.astype(float)
+    X = X * w[..., None]
+    y = y * w
+    n = w.sum(axis=1)
+
+    # 未使用の列は0なので、擬似逆行列ではその係数が0になる
+    XtX_inv = np.linalg.pinv(np.einsum('snk,snl->skl', X, X))
+    coef = np.einsum('skl,snl,sn->sk', XtX_inv, X, y)
+    resid = (y - np.einsum('snk,sk->sn', X, coef)) * w
+
+    # HC1: (X'X)^-1 X' diag(e^2) X (X'X)^-1 * n / (n - k)
+    meat = np.einsum('snk,sn,snl->skl', X, resid ** 2, X)
+    dof = np.clip(n - num_params, 1, None)
+    cov = XtX_inv @ meat @ XtX_inv * (n / dof)[:, None, None]
+    se = np.sqrt(np.clip(np.diagonal(cov, axis1=1, axis2=2), 0, None))
+
+    y_mean = y.sum(axis=1) / np.clip(n, 1, None)
+    sst = (((y - y_mean[:, None]) * w) ** 2).sum(axis=1)
+    ssr = (resid ** 2).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r2 = 1 - ssr / sst
+        adj_r2 = 1 - (1 - r2) * (n - 1) / dof
+    return {'coef': coef, 'se': se, 'r2': r2, 'adj_r2': adj_r2, 'n': n, 'dof': dof}
+
+class RegressionEngine:
+    def __init__(self, df: pd.DataFrame, group_column: str = 'asset', include_pooled: bool = True):
+        """資産 × 従属変数 × 説明変数 × ラグの回帰をまとめて推定"""
+        self.group_column = group_column
+        self.df = df
+        self.include_pooled = include_pooled
+
+    def build_specifications(self, dependents=None, sentiment_sets=None, control_sets=None, lags=None) -> List[Dict[str, Any]]:
+        """推定する仕様（資産, 従属変数, 説明変数）の一覧"""
+        dependents = [c for c in (dependents or DEPENDENT_VARIABLES) if c in self.df.columns]
+        sentiment_sets = sentiment_sets or SENTIMENT_SETS
+        control_sets = control_sets or CONTROL_SETS
+        lags = SENTIMENT_LAGS if lags is None else lags
+
+        # ラグは資産ごとに作ってから、全資産をまとめた 'ALL' グループを加える
+        features = sorted({f for s in sentiment_sets for f in s})
+        self.data = add_lagged_features(self.df, features, lags, self.group_column)
+        if self.include_pooled:
+            self.data = pd.concat([self.data, self.data.assign(**{self.group_column: 'ALL'})], ignore_index=True)
+
+        specs = []
+        for asset, dependent, sentiment, controls, lag in product(
+            pd.unique(self.data[self.group_column]), dependents, sentiment_sets, control_sets, lags
+        ):
+            regressors = [f if lag == 0 else f'{f}_lag{lag}' for f in sentiment] + list(controls)
+            if all(c in self.data.columns for c in regressors):
+                specs.append({'asset': asset, 'dependent': dependent, 'regressors': regressors, 'lag': lag})
+        return specs
+
+    def fit(self, specs: List[Dict[str, Any]]) -> pd.DataFrame:
+        """全仕様の計画行列を積み重ねて一括推定し、係数ごとの表を返す"""
+        groups = {asset: frame for asset, frame in self.data.groupby(self.group_column, sort=False)}
+        max_rows = max(len(frame) for frame in groups.values())
+        max_params = max(len(spec['regressors']) for spec in specs) + 1
+
+        X = np.zeros((len(specs), max_rows, max_params))
+        y = np.zeros((len(specs), max_rows))
+        mask = np.zeros((len(specs), max_rows), dtype=bool)
+        num_params = np.zeros(len(specs))
+        for s, spec in enumerate(specs):
+            frame = groups[spec['asset']]
+            values = frame[[spec['dependent']] + spec['regressors']].to_numpy(dtype=float)
+            rows = len(values)
+            X[s, :rows, 0] = 1.0
+            X[s, :rows, 1:len(spec['regressors']) + 1] = values[:, 1:]
+            y[s, :rows] = values[:, 0]
+            mask[s, :rows] = ~np.isnan(values).any(axis=1)
+            num_params[s] = len(spec['regressors']) + 1
+        X = np.nan_to_num(X)
+        y = np.nan_to_num(y)
+
+        result = batched_ols(X, y, mask, num_params)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t_values = result['coef'] / result['se']
+        p_values = 2 * stats.t.sf(np.abs(t_values), result['dof'][:, None])
+
+        rows = []
+        for s, spec in enumerate(specs):
+            for j, term in enumerate(['const'] + spec['regressors']):
+                rows.append({
+                    'spec_id': s,
+                    'asset': spec['asset'],
+                    'dependent': spec['dependent'],
+                    'regressors': ' + '.join(spec['regressors']),
+                    'lag': spec['lag'],
+                    'term': term,
+                    'coef': result['coef'][s, j],
+                    'se_hc1': result['se'][s, j],
+                    't_value': t_values[s, j],
+                    'p_value': p_values[s, j],
+                    'n': int(result['n'][s]),
+                    'r2': result['r2'][s],
+                    'adj_r2': result['adj_r2'][s],
+                })
+        return pd.DataFrame(rows)
+
+def main():
+    """メイン関数"""
+    input_file = "data_with_sentiment_scores_correct.csv"
+    output_file = "regression_results.csv"
+
+    print("=== センチメント → リターン 回帰分析 ===")
+    print(f"入力ファイル: {input_file}")
+
+    try:
+        df = pd.read_csv(input_file)
+        engine = RegressionEngine(df)
+        specs = engine.build_specifications()
+        print(f"推定する仕様の数: {len(specs)}")
+
+        start = time.perf_counter()
+        results = engine.fit(specs)
+        print(f"推定時間: {time.perf_counter() - start:.3f} 秒")
+
+        results.to_csv(output_file, index=False, encoding='utf-8-sig')
+        print(f"結果を保存しました: {output_file}")
+
+        # センチメント項のうち有意なもの
+        sentiment_terms = results[~results['term'].isin(['const', 'sigma'])]
+        significant = sentiment_terms[sentiment_terms['p_value'] < 0.05]
+        print(f"\n=== 5%水準で有意なセンチメント項: {len(significant)} / {len(sentiment_terms)} ===")
+        if len(significant):
+            print(significant[['asset', 'dependent', 'regressors', 'term', 'coef', 'se_hc1', 'p_value', 'r2']]
+                  .to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,24 @@
 import pandas as pd
-import torch
-from transformers import (
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
-    BertJapaneseTokenizer,
-)
 import sys
 import re
 from typing import List, Dict, Any
 
 class SentimentAnalyzer:
-    def __init__(self):
-        """BERTモデルを初期化"""
+    def __init__(self, use_server: bool = False):
+        """BERTモデルを初期化（use_server=True なら起動中の常駐スコアリングサービスを優先）"""
+        self.client = None
+        if use_server:
+            from sentiment_server import connect_if_running
+            self.client = connect_if_running()
+            if self.client is not None:
+                return
+        
         print("BERTモデルを読み込み中...")
         try:
             # BERTを用いた日本語の感情分析モデルをロード
-            self.tokenizer = BertJapaneseTokenizer.from_pretrained(
-                "cl-tohoku/bert-base-japanese-whole-word-masking"
-            )
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                "koheiduck/bert-japanese-finetuned-sentiment"
-            )
+            # （model_snapshot.py で作成したローカルスナップショットがあればオフラインで読み込む）
+            from model_snapshot import load_tokenizer_and_model
+            self.tokenizer, self.model = load_tokenizer_and_model()
             print("BERTモデルの読み込みが完了しました。")
         except Exception as e:
             print(f"BERTモデルの読み込みエラー: {e}")
@@ -49,10 +47,14 @@ class SentimentAnalyzer:
             }
         
         try:
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-            with torch.no_grad():
-                logits = self.model(**inputs).logits
-            prob = torch.softmax(logits, dim=1)[0]
+            if self.client is not None:
+                prob = self.client.predict_probabilities([text])[0]
+            else:
+                import torch
+                inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+                with torch.no_grad():
+                    logits = self.model(**inputs).logits
+                prob = torch.softmax(logits, dim=1)[0]
             
             # モデルの出力: [neutral, negative, positive]
             neutral_prob = float(prob[0])
@@ -124,7 +126,7 @@ class SentimentAnalyzer:
             'individual_scores': individual_scores
         }
 
-def process_csv_with_sentiment(input_csv_path: str, output_csv_path: str):
+def process_csv_with_sentiment(input_csv_path: str, output_csv_path: str, use_server: bool = True):
     """CSVファイルのニュースタイトルにセンチメントスコアを追加"""
     print("=== ニュースタイトルのセンチメント分析を開始 ===")
     
@@ -138,7 +140,7 @@ def process_csv_with_sentiment(input_csv_path: str, output_csv_path: str):
         return
     
     # センチメントアナライザーを初期化
-    analyzer = SentimentAnalyzer()
+    analyzer = SentimentAnalyzer(use_server=use_server)
     
     # 結果を格納するリスト
     sentiment_results = []
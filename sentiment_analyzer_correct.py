@@ -1,27 +1,78 @@
+import numpy as np
 import pandas as pd
-import torch
-from transformers import (
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
-    BertJapaneseTokenizer,
-)
 import sys
 import re
 from typing import List, Dict, Any
 
+# BERTフォルダのコードと同じモデル
+TOKENIZER_NAME = "cl-tohoku/bert-base-japanese-whole-word-masking"
+MODEL_NAME = "koheiduck/bert-japanese-finetuned-sentiment"
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+# torch / transformers はローカルでモデルを読み込む場合だけ読み込む（常駐サービス利用時は不要）
+
+def bf16_supported() -> bool:
+    """CPUがbf16の行列演算をネイティブにサポートしているか"""
+    import torch
+    check = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+    return bool(check and check())
+
+def apply_precision(model, precision: str):
+    """推論精度に合わせてモデルを変換（int8は線形層の動的量子化）"""
+    if precision not in PRECISIONS:
+        raise ValueError(f"不明な推論精度です: {precision}")
+    if precision == "int8":
+        import torch
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if precision == "bf16" and not bf16_supported():
+        print("警告: このCPUはbf16をネイティブにサポートしていないため、低速になる可能性があります")
+    return model
+
 class CorrectSentimentAnalyzer:
-    def __init__(self):
-        """BERTフォルダのコードを参考にした正確な感情分析器を初期化"""
+    def __init__(self, backend: str = "pytorch", onnx_path: str = None, precision: str = "fp32",
+                 use_server: bool = False):
+        """BERTフォルダのコードを参考にした正確な感情分析器を初期化
+
+        Args:
+            backend (str): 推論バックエンド（"pytorch" または "onnx"）
+            onnx_path (str): ONNXモデルのパス（backend="onnx" の場合）
+            precision (str): 推論精度（"fp32", "int8", "bf16"。backend="pytorch" の場合のみ）
+            use_server (bool): 常駐スコアリングサービスが起動していればモデルを読み込まずに利用する
+        """
         print("BERTフォルダのコードを参考にした感情分析器を初期化中...")
+        self.backend = backend
+        self.precision = precision
+        self.client = None
+        if use_server:
+            from sentiment_server import connect_if_running
+            self.client = connect_if_running()
+            if self.client is not None:
+                self.backend = "server"
+                self.tokenizer = None
+                self.model = None
+                return
         try:
             # BERTフォルダのコードと同じモデルを使用
-            self.tokenizer = BertJapaneseTokenizer.from_pretrained(
-                "cl-tohoku/bert-base-japanese-whole-word-masking"
-            )
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                "koheiduck/bert-japanese-finetuned-sentiment"
-            )
-            print("BERTモデルの読み込みが完了しました。")
+            # （model_snapshot.py で作成したローカルスナップショットがあればオフラインで読み込む）
+            from model_snapshot import load_tokenizer_and_model, has_snapshot, MODEL_SNAPSHOT_DIR
+            if backend == "onnx":
+                # ONNX Runtimeのセッションを PyTorch モデルの代わりに使う
+                from onnx_backend import OnnxSentimentModel, ONNX_MODEL_PATH
+                from transformers import BertJapaneseTokenizer
+                if has_snapshot(MODEL_SNAPSHOT_DIR):
+                    self.tokenizer = BertJapaneseTokenizer.from_pretrained(
+                        f"{MODEL_SNAPSHOT_DIR}/tokenizer", local_files_only=True
+                    )
+                else:
+                    self.tokenizer = BertJapaneseTokenizer.from_pretrained(TOKENIZER_NAME)
+                self.model = OnnxSentimentModel(onnx_path or ONNX_MODEL_PATH)
+            elif backend == "pytorch":
+                self.tokenizer, self.model = load_tokenizer_and_model(MODEL_SNAPSHOT_DIR)
+                self.model = apply_precision(self.model, precision)
+            else:
+                raise ValueError(f"不明なバックエンドです: {backend}")
+            print(f"BERTモデルの読み込みが完了しました。（バックエンド: {backend}, 精度: {precision}）")
         except Exception as e:
             print(f"BERTモデルの読み込みエラー: {e}")
             sys.exit(1)
@@ -43,11 +94,8 @@ class CorrectSentimentAnalyzer:
             return 0.0
         
         try:
-            # BERTフォルダのコードと同じ実装
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True)
-            with torch.no_grad():
-                logits = self.model(**inputs).logits
-            prob = torch.softmax(logits, dim=1)[0]
+            # BERTフォルダのコードと同じ実装（1件のみのバッチなのでパディングは入らない）
+            prob = self.predict_probabilities([text])[0]
             
             if verbose:
                 print(f"テキスト: {text}")
@@ -61,28 +109,47 @@ class CorrectSentimentAnalyzer:
                 print(f"感情分析エラー: {e}")
             return 0.0
     
+    def predict_probabilities(self, texts: List[str], batch_size: int = 32, token_cache=None):
+        """複数テキストをバッチで推論し、[中立, ネガティブ, ポジティブ] の確率を返す
+
+        ローカルのモデルでは torch.Tensor、常駐サービス利用時は torch を読み込まずに np.ndarray を返す
+        （どちらも np.asarray で配列に変換できる）。
+        token_cache（token_cache.TokenCache）を渡すと、トークナイザーの代わりにキャッシュから入力を作成する。
+        """
+        if self.client is not None:
+            return np.asarray(self.client.predict_probabilities(texts), dtype=np.float32).reshape(-1, 3)
+        
+        import torch
+        probs = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            if token_cache is not None:
+                inputs = token_cache.encode_batch(batch)
+            else:
+                inputs = self.tokenizer(batch, return_tensors="pt", truncation=True, padding=True)
+            logits = self.compute_logits(inputs)
+            probs.append(torch.softmax(logits, dim=1))
+        if not probs:
+            return torch.zeros((0, 3))
+        return torch.cat(probs, dim=0)
+    
+    def compute_logits(self, inputs) -> "torch.Tensor":
+        """トークン化済みの入力からlogits（float32）を計算"""
+        import torch
+        with torch.no_grad():
+            if self.precision == "bf16":
+                with torch.autocast("cpu", dtype=torch.bfloat16):
+                    logits = self.model(**inputs).logits
+            else:
+                logits = self.model(**inputs).logits
+        return logits.float()
+    
     def analyze_news_titles(self, news_titles: str, verbose: bool = False) -> Dict[str, Any]:
         """ニュースタイトルの感情分析（BERTフォルダのコードを参考）"""
-        if pd.isna(news_titles) or news_titles.strip() == "":
-            return {
-                'avg_sentiment_score': 0.0,
-                'positive_count': 0,
-                'negative_count': 0,
-                'neutral_count': 0,
-                'total_titles': 0
-            }
-        
         # ニュースタイトルを分割（|で区切られている）
-        titles = [title.strip() for title in news_titles.split('|') if title.strip()]
-        
+        titles = split_news_titles(news_titles)
         if not titles:
-            return {
-                'avg_sentiment_score': 0.0,
-                'positive_count': 0,
-                'negative_count': 0,
-                'neutral_count': 0,
-                'total_titles': 0
-            }
+            return summarize_scores([])
         
         if verbose:
             print(f"\n--- ニュースタイトル分析開始 ---")
@@ -98,35 +165,15 @@ class CorrectSentimentAnalyzer:
                 print(f"タイトル {i+1}: {score:.4f}")
         
         # BERTフォルダのコードと同じ方法で統計を計算
-        if scores:
-            average_score = sum(scores) / len(scores)
-            positive_count = sum(1 for s in scores if s > 0.1)
-            negative_count = sum(1 for s in scores if s < -0.1)
-            neutral_count = len(scores) - positive_count - negative_count
-            
-            if verbose:
-                print(f"\n--- 分析結果 ---")
-                print(f"全体の平均感情スコア: {average_score:.4f}")
-                print(f"ポジティブなタイトル数: {positive_count}")
-                print(f"ネガティブなタイトル数: {negative_count}")
-                print(f"中立的なタイトル数: {neutral_count}")
-                print(f"総タイトル数: {len(titles)}")
-            
-            return {
-                'avg_sentiment_score': average_score,
-                'positive_count': positive_count,
-                'negative_count': negative_count,
-                'neutral_count': neutral_count,
-                'total_titles': len(titles)
-            }
-        else:
-            return {
-                'avg_sentiment_score': 0.0,
-                'positive_count': 0,
-                'negative_count': 0,
-                'neutral_count': 0,
-                'total_titles': 0
-            }
+        summary = summarize_scores(scores)
+        if verbose:
+            print(f"\n--- 分析結果 ---")
+            print(f"全体の平均感情スコア: {summary['avg_sentiment_score']:.4f}")
+            print(f"ポジティブなタイトル数: {summary['positive_count']}")
+            print(f"ネガティブなタイトル数: {summary['negative_count']}")
+            print(f"中立的なタイトル数: {summary['neutral_count']}")
+            print(f"総タイトル数: {summary['total_titles']}")
+        return summary
     
     def test_with_sample_texts(self):
         """BERTフォルダのコードと同じテストテキストで動作確認"""
@@ -238,6 +285,45 @@ class CorrectSentimentAnalyzer:
             print(f"  ネガティブ優勢: {negative_rows} 行 ({negative_rows/rows_with_news*100:.1f}%)")
             print(f"  中立: {neutral_rows} 行 ({neutral_rows/rows_with_news*100:.1f}%)")
 
+def split_news_titles(news_titles) -> List[str]:
+    """analyze_news_titles と同じ方法で | 区切りのタイトルを分割"""
+    if pd.isna(news_titles) or str(news_titles).strip() == "":
+        return []
+    return [title.strip() for title in str(news_titles).split('|') if title.strip()]
+
+def summarize_scores(scores) -> Dict[str, Any]:
+    """タイトルごとのスコアから analyze_news_titles と同じ集計値を計算"""
+    scores = [float(s) for s in scores]
+    if not scores:
+        return {
+            'avg_sentiment_score': 0.0,
+            'positive_count': 0,
+            'negative_count': 0,
+            'neutral_count': 0,
+            'total_titles': 0
+        }
+    positive_count = sum(1 for s in scores if s > 0.1)
+    negative_count = sum(1 for s in scores if s < -0.1)
+    return {
+        'avg_sentiment_score': sum(scores) / len(scores),
+        'positive_count': positive_count,
+        'negative_count': negative_count,
+        'neutral_count': len(scores) - positive_count - negative_count,
+        'total_titles': len(scores)
+    }
+
+def load_news_titles(csv_path: str, column: str = 'news_titles') -> List[str]:
+    """CSVの news_titles 列から重複を除いたタイトル一覧を取得"""
+    df = pd.read_csv(csv_path)
+    titles = []
+    seen = set()
+    for news_titles in df[column].dropna():
+        for title in split_news_titles(news_titles):
+            if title not in seen:
+                seen.add(title)
+                titles.append(title)
+    return titles
+
 def main():
     """メイン関数"""
     input_file = "data_with_news_titles.csv"
@@ -248,8 +334,8 @@ def main():
     print(f"出力ファイル: {output_file}")
     
     try:
-        # センチメント分析器を初期化
-        analyzer = CorrectSentimentAnalyzer()
+        # センチメント分析器を初期化（常駐サービスが起動していれば利用）
+        analyzer = CorrectSentimentAnalyzer(use_server=True)
         
         # まずテストテキストで動作確認
         analyzer.test_with_sample_texts()
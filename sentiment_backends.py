@@ -0,0 +1,119 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Callable
+
+# 登録済みの感情分析バックエンド（名前 → 生成関数）
+SENTIMENT_BACKENDS: Dict[str, Callable[[], "SentimentBackend"]] = {}
+
+# スコア一致度の基準とするバックエンド
+REFERENCE_BACKEND = "correct"
+
+def register_backend(name: str):
+    """バックエンドの生成関数を登録するデコレータ"""
+    def decorator(factory):
+        if name in SENTIMENT_BACKENDS:
+            raise ValueError(f"バックエンド '{name}' はすでに登録されています")
+        SENTIMENT_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+def create_backend(name: str) -> "SentimentBackend":
+    """登録名からバックエンドを生成"""
+    if name not in SENTIMENT_BACKENDS:
+        raise ValueError(f"不明なバックエンドです: {name}（登録済み: {', '.join(SENTIMENT_BACKENDS)}）")
+    return SENTIMENT_BACKENDS[name]()
+
+class SentimentBackend(ABC):
+    """共通のスコアリングインターフェース: タイトルのリストから -1～1 のスコアを返す"""
+
+    name = ""
+
+    @abstractmethod
+    def score_batch(self, titles: List[str]) -> List[float]:
+        """タイトルごとのスコア（入力と同じ順序）"""
+
+class PerTitleBackend(SentimentBackend):
+    def __init__(self, name: str, score_fn: Callable[[str], float], clean_fn: Callable[[str], str] = None):
+        """1件ずつスコアリングする既存の分析器を包むバックエンド（clean_fn に各スクリプトの clean_text を渡す）"""
+        self.name = name
+        self.score_fn = score_fn
+        self.clean_fn = clean_fn
+
+    def score_batch(self, titles: List[str]) -> List[float]:
+        if self.clean_fn is not None:
+            titles = [self.clean_fn(t) for t in titles]
+        return [float(self.score_fn(t)) for t in titles]
+
+class ProbabilityBackend(SentimentBackend):
+    def __init__(self, name: str, analyzer, batch_size: int = 32):
+        """predict_probabilities を持つ分析器をバッチで使うバックエンド"""
+        self.name = name
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+
+    def score_batch(self, titles: List[str]) -> List[float]:
+        probs = self.analyzer.predict_probabilities(titles, batch_size=self.batch_size)
+        return (probs[:, 2] - probs[:, 1]).tolist()
+
+class CascadeBackend(SentimentBackend):
+    def __init__(self, name: str, cascade):
+        """辞書 → BERT カスケードを包むバックエンド"""
+        self.name = name
+        self.cascade = cascade
+
+    def score_batch(self, titles: List[str]) -> List[float]:
+        scores, _ = self.cascade.get_sentiment_scores(titles)
+        return scores.tolist()
+
+@register_backend("correct")
+def _correct_backend():
+    """sentiment_analyzer_correct.py（基準）"""
+    from sentiment_analyzer_correct import CorrectSentimentAnalyzer
+    return ProbabilityBackend("correct", CorrectSentimentAnalyzer())
+
+@register_backend("correct_int8")
+def _correct_int8_backend():
+    """sentiment_analyzer_correct.py のINT8動的量子化"""
+    from sentiment_analyzer_correct import CorrectSentimentAnalyzer
+    return ProbabilityBackend("correct_int8", CorrectSentimentAnalyzer(precision="int8"))
+
+@register_backend("correct_onnx")
+def _correct_onnx_backend():
+    """sentiment_analyzer_correct.py のONNX Runtime実行"""
+    from sentiment_analyzer_correct import CorrectSentimentAnalyzer
+    return ProbabilityBackend("correct_onnx", CorrectSentimentAnalyzer(backend="onnx"))
+
+@register_backend("default")
+def _default_backend():
+    """sentiment_analyzer.py の SentimentAnalyzer"""
+    from sentiment_analyzer import SentimentAnalyzer
+    analyzer = SentimentAnalyzer()
+    return PerTitleBackend(
+        "default", lambda t: analyzer.get_sentiment_score(t)['sentiment_score'], analyzer.clean_text
+    )
+
+@register_backend("fixed")
+def _fixed_backend():
+    """sentiment_analyzer_fixed.py の FixedSentimentAnalyzer"""
+    from sentiment_analyzer_fixed import FixedSentimentAnalyzer
+    analyzer = FixedSentimentAnalyzer()
+    return PerTitleBackend("fixed", analyzer.analyze_sentiment, analyzer.clean_text)
+
+@register_backend("bert_test")
+def _bert_test_backend():
+    """bert_test.py の SentimentAnalyzer"""
+    from bert_test import SentimentAnalyzer as BertTestSentimentAnalyzer
+    analyzer = BertTestSentimentAnalyzer()
+    return PerTitleBackend("bert_test", analyzer.analyze_sentiment, analyzer.clean_text)
+
+@register_backend("alternative")
+def _alternative_backend():
+    """bert_test_alternative.py の AlternativeSentimentAnalyzer"""
+    from bert_test_alternative import AlternativeSentimentAnalyzer
+    analyzer = AlternativeSentimentAnalyzer()
+    return PerTitleBackend("alternative", analyzer.analyze_sentiment_multilingual, analyzer.clean_text)
+
+@register_backend("cascade")
+def _cascade_backend():
+    """cascade_sentiment.py の辞書 → BERT カスケード"""
+    from cascade_sentiment import CascadeSentimentAnalyzer
+    return CascadeBackend("cascade", CascadeSentimentAnalyzer())
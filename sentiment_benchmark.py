@@ -0,0 +1,111 @@
+import multiprocessing as mp
+import resource
+import sys
+import time
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+from sentiment_backends import SENTIMENT_BACKENDS, REFERENCE_BACKEND, create_backend
+
+def _run_backend(name: str, titles: List[str], batch_size: int) -> Dict[str, Any]:
+    """子プロセス内でバックエンドを1つ実行（ピークRSSをバックエンドごとに分けるため）"""
+    start = time.perf_counter()
+    try:
+        backend = create_backend(name)
+    except SystemExit:
+        # 分析器はモデルの読み込みに失敗すると sys.exit するため、プールが止まらないよう例外に変換
+        raise RuntimeError(f"バックエンド '{name}' のモデルを読み込めませんでした")
+    load_seconds = time.perf_counter() - start
+
+    # ウォームアップ
+    backend.score_batch(titles[:batch_size])
+
+    scores = []
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(titles), batch_size):
+        began = time.perf_counter()
+        scores.extend(backend.score_batch(titles[i:i + batch_size]))
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'backend': name,
+        'scores': scores,
+        'load_seconds': load_seconds,
+        'titles_per_sec': len(titles) / elapsed if elapsed > 0 else 0.0,
+        'p50_batch_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_batch_ms': float(np.percentile(latencies, 99) * 1000),
+        # Linuxでは ru_maxrss はKB単位
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def run_benchmark(titles: List[str], backends: List[str], batch_size: int = 32) -> pd.DataFrame:
+    """各バックエンドを別プロセスで実行し、速度・メモリ・基準とのスコア一致度を集計"""
+    if REFERENCE_BACKEND not in backends:
+        backends = [REFERENCE_BACKEND] + backends
+
+    context = mp.get_context("spawn")
+    results = {}
+    for name in backends:
+        print(f"\n--- バックエンド: {name} ---")
+        try:
+            with context.Pool(1) as pool:
+                result = pool.apply(_run_backend, (name, titles, batch_size))
+        except Exception as e:
+            print(f"  実行エラー: {e}")
+            continue
+        results[name] = result
+        print(f"  {result['titles_per_sec']:.1f} 件/秒, p50 {result['p50_batch_ms']:.1f} ms, "
+              f"p99 {result['p99_batch_ms']:.1f} ms, ピークRSS {result['peak_rss_mb']:.0f} MB")
+
+    reference = np.array(results[REFERENCE_BACKEND]['scores']) if REFERENCE_BACKEND in results else None
+
+    def classify(scores):
+        return np.where(scores > 0.1, 1, np.where(scores < -0.1, -1, 0))
+
+    rows = []
+    for name, result in results.items():
+        scores = np.array(result['scores'])
+        row = {k: v for k, v in result.items() if k != 'scores'}
+        if reference is not None:
+            row['corr_with_reference'] = float(np.corrcoef(scores, reference)[0, 1]) if scores.std() > 0 else float('nan')
+            row['label_agreement'] = float(np.mean(classify(scores) == classify(reference)))
+            row['mean_abs_diff'] = float(np.mean(np.abs(scores - reference)))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def main():
+    """メイン関数"""
+    input_file = "data_with_news_titles.csv"
+    output_file = "sentiment_benchmark_results.csv"
+    max_titles = 500  # 固定のベンチマークコーパス（先頭から）
+    batch_size = 32
+
+    print("=== 感情分析バックエンド ベンチマーク ===")
+    print(f"入力ファイル: {input_file}")
+    print(f"登録済みバックエンド: {', '.join(SENTIMENT_BACKENDS)}")
+    print(f"基準バックエンド: {REFERENCE_BACKEND}")
+
+    try:
+        from sentiment_analyzer_correct import load_news_titles
+        titles = load_news_titles(input_file)[:max_titles]
+        print(f"ベンチマーク対象タイトル数: {len(titles)}")
+
+        report = run_benchmark(titles, list(SENTIMENT_BACKENDS), batch_size)
+        report.to_csv(output_file, index=False, encoding='utf-8-sig')
+
+        print(f"\n=== ベンチマーク結果 ===")
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        print(f"\n結果を保存しました: {output_file}")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import requests
+
+# 常駐スコアリングサービスの待ち受けアドレス（ローカルホストのみ）
+SENTIMENT_SERVER_HOST = "127.0.0.1"
+SENTIMENT_SERVER_PORT = 8765
+
+class SentimentClient:
+    def __init__(self, host: str = SENTIMENT_SERVER_HOST, port: int = SENTIMENT_SERVER_PORT,
+                 timeout: float = 60.0):
+        """常駐スコアリングサービスのクライアント（torch/transformersを読み込まない）"""
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def is_available(self) -> bool:
+        """サービスが起動しているか確認"""
+        try:
+            response = self.session.get(f"{self.base_url}/health", timeout=0.5)
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    def predict_probabilities(self, texts: List[str], batch_size: int = 256) -> List[List[float]]:
+        """[中立, ネガティブ, ポジティブ] の確率をサービスに問い合わせる"""
+        probs = []
+        for start in range(0, len(texts), batch_size):
+            response = self.session.post(
+                f"{self.base_url}/predict",
+                json={'texts': texts[start:start + batch_size]},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            probs.extend(response.json()['probabilities'])
+        return probs
+
+def connect_if_running(host: str = SENTIMENT_SERVER_HOST, port: int = SENTIMENT_SERVER_PORT):
+    """サービスが起動していればクライアントを返し、起動していなければNoneを返す"""
+    client = SentimentClient(host, port)
+    if client.is_available():
+        print(f"常駐スコアリングサービスに接続しました: {client.base_url}")
+        return client
+    return None
+
+class SentimentRequestHandler(BaseHTTPRequestHandler):
+    """GET /health と POST /predict を処理するハンドラ"""
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {'status': 'ok', 'backend': self.server.analyzer.backend})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length).decode("utf-8"))['texts']
+            # モデルは1つなので推論は直列化する
+            with self.server.lock:
+                probs = self.server.analyzer.predict_probabilities(texts, batch_size=self.server.batch_size)
+            self._send_json(200, {'probabilities': probs.tolist()})
+        except Exception as e:
+            self._send_json(400, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        # リクエストごとのログは出さない
+        pass
+
+class SentimentServer(ThreadingHTTPServer):
+    def __init__(self, analyzer, host: str = SENTIMENT_SERVER_HOST, port: int = SENTIMENT_SERVER_PORT,
+                 batch_size: int = 32):
+        """読み込み済みのモデルを保持してリクエストを処理するHTTPサーバー"""
+        super().__init__((host, port), SentimentRequestHandler)
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+
+def main():
+    """メイン関数: モデルを読み込んでサービスを起動"""
+    print("=== 常駐センチメントスコアリングサービス ===")
+    print(f"待ち受けアドレス: http://{SENTIMENT_SERVER_HOST}:{SENTIMENT_SERVER_PORT}")
+
+    if SentimentClient().is_available():
+        print("サービスはすでに起動しています。")
+        return
+
+    start = time.perf_counter()
+    from sentiment_analyzer_correct import CorrectSentimentAnalyzer
+    analyzer = CorrectSentimentAnalyzer()
+    print(f"モデルの読み込み時間: {time.perf_counter() - start:.1f} 秒")
+
+    server = SentimentServer(analyzer)
+    print("リクエストを待機しています（Ctrl+C で終了）...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nサービスを終了します。")
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+import json
+import os
+import sys
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+# 状態ファイルと出力ファイル
+STREAMING_STATE_PATH = "streaming_correlation_state.json"
+# 既定のローリングウィンドウ（data.csv の資産ごとの行数は 84～106 件）
+ROLLING_WINDOWS = (20, 60)
+ROLLING_HISTORY_PATH = "rolling_correlation_history.csv"
+
+class OnlineCorrelation:
+    def __init__(self):
+        """Welford法による平均・分散・共分散のオンライン更新（追加・削除ともO(1)）"""
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def add(self, x: float, y: float):
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        dy = y - self.mean_y
+        self.mean_y += dy / self.n
+        self.m2_x += dx * (x - self.mean_x)
+        self.m2_y += dy * (y - self.mean_y)
+        self.c_xy += dx * (y - self.mean_y)
+
+    def remove(self, x: float, y: float):
+        """add の逆操作（ローリングウィンドウから最古の観測を外す）"""
+        if self.n <= 1:
+            self.__init__()
+            return
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.n -= 1
+        self.mean_x -= dx / self.n
+        self.mean_y -= dy / self.n
+        self.m2_x -= dx * (x - self.mean_x)
+        self.m2_y -= dy * (y - self.mean_y)
+        self.c_xy -= dx * (y - self.mean_y)
+
+    def correlation(self) -> float:
+        if self.n < 3 or self.m2_x <= 1e-12 or self.m2_y <= 1e-12:
+            return float('nan')
+        return float(np.clip(self.c_xy / np.sqrt(self.m2_x * self.m2_y), -1.0, 1.0))
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, float]) -> "OnlineCorrelation":
+        stats = cls()
+        stats.__dict__.update(state)
+        return stats
+
+class RollingCorrelation:
+    def __init__(self, window: int):
+        """直近 window 件の観測のピアソン相関とスピアマン相関
+
+        ピアソン相関は Welford 法で追加・削除とも O(1) で更新する。
+        スピアマン相関は1件の追加で他の観測の順位がずれるため O(1) では更新できない。
+        ソート済みのウィンドウを二分探索の挿入・削除（O(w)）で保持し、spearman() を呼んだときに
+        順位をまとめて求め直す（O(w log w)、NumPy で一括計算）。
+        """
+        self.window = window
+        self.observations = deque()
+        self.stats = OnlineCorrelation()
+        self.sorted_x: List[float] = []
+        self.sorted_y: List[float] = []
+
+    def add(self, x: float, y: float):
+        self.observations.append((x, y))
+        self.stats.add(x, y)
+        insort(self.sorted_x, x)
+        insort(self.sorted_y, y)
+        if len(self.observations) > self.window:
+            old_x, old_y = self.observations.popleft()
+            self.stats.remove(old_x, old_y)
+            del self.sorted_x[bisect_left(self.sorted_x, old_x)]
+            del self.sorted_y[bisect_left(self.sorted_y, old_y)]
+
+    def is_full(self) -> bool:
+        return len(self.observations) >= self.window
+
+    def pearson(self) -> float:
+        return self.stats.correlation()
+
+    def spearman(self) -> float:
+        """ソート済みウィンドウの二分探索で平均順位（同順位は平均）を求め直し、順位の相関を計算"""
+        if len(self.observations) < 3:
+            return float('nan')
+
+        def rank(sorted_values, values):
+            sorted_values = np.asarray(sorted_values)
+            return (np.searchsorted(sorted_values, values, side='left')
+                    + np.searchsorted(sorted_values, values, side='right') + 1) / 2
+
+        values = np.asarray(self.observations, dtype=float)
+        rank_x = rank(self.sorted_x, values[:, 0])
+        rank_y = rank(self.sorted_y, values[:, 1])
+        if rank_x.std() == 0 or rank_y.std() == 0:
+            return float('nan')
+        return float(np.corrcoef(rank_x, rank_y)[0, 1])
+
+class StreamingCorrelationTracker:
+    def __init__(self, feature: str = 'avg_sentiment_score', target: str = 'jump_width',
+                 windows=ROLLING_WINDOWS, group_column: str = 'asset'):
+        """資産ごとの累積・ローリング相関を新しい観測だけで更新するトラッカー
+
+        ローリングウィンドウの長さは観測数（data.csv の行数）で数える。
+
+        Args:
+            feature (str): センチメント側の列
+            target (str): 市場側の列
+            windows (tuple): ローリングウィンドウの長さ
+            group_column (str): 資産の列
+        """
+        self.feature = feature
+        self.target = target
+        self.windows = tuple(windows)
+        self.group_column = group_column
+        self.cumulative: Dict[str, OnlineCorrelation] = {}
+        self.rolling: Dict[str, Dict[int, RollingCorrelation]] = {}
+        self.last_date: Dict[str, str] = {}
+
+    def update(self, asset: str, date: str, x: float, y: float) -> Dict[str, Any]:
+        """1件の観測を追加し、その時点の相関を返す"""
+        if asset not in self.cumulative:
+            self.cumulative[asset] = OnlineCorrelation()
+            self.rolling[asset] = {w: RollingCorrelation(w) for w in self.windows}
+        self.cumulative[asset].add(x, y)
+        self.last_date[asset] = date
+
+        row = {'asset': asset, 'date': date, 'n': self.cumulative[asset].n,
+               'cumulative_pearson': self.cumulative[asset].correlation()}
+        for window, rolling in self.rolling[asset].items():
+            rolling.add(x, y)
+            full = rolling.is_full()
+            row[f'rolling_{window}_pearson'] = rolling.pearson() if full else float('nan')
+            row[f'rolling_{window}_spearman'] = rolling.spearman() if full else float('nan')
+        return row
+
+    def update_from_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """前回の更新より新しい日付の行だけを処理し、相関の時系列を返す"""
+        rows = []
+        df = df.dropna(subset=[self.feature, self.target]).sort_values('date', kind='stable')
+        for asset, date, x, y in zip(df[self.group_column], df['date'], df[self.feature], df[self.target]):
+            if asset in self.last_date and str(date) <= self.last_date[asset]:
+                continue
+            rows.append(self.update(asset, str(date), float(x), float(y)))
+        return pd.DataFrame(rows)
+
+    def save(self, path: str = STREAMING_STATE_PATH):
+        """状態（Welfordの統計量とウィンドウ内の観測）をJSONに保存"""
+        state = {
+            'feature': self.feature,
+            'target': self.target,
+            'windows': list(self.windows),
+            'group_column': self.group_column,
+            'last_date': self.last_date,
+            'assets': {
+                asset: {
+                    'cumulative': self.cumulative[asset].to_dict(),
+                    'rolling': {str(w): list(r.observations) for w, r in self.rolling[asset].items()},
+                }
+                for asset in self.cumulative
+            },
+        }
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str = STREAMING_STATE_PATH) -> "StreamingCorrelationTracker":
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        tracker = cls(state['feature'], state['target'], state['windows'], state['group_column'])
+        tracker.last_date = state['last_date']
+        for asset, asset_state in state['assets'].items():
+            tracker.cumulative[asset] = OnlineCorrelation.from_dict(asset_state['cumulative'])
+            tracker.rolling[asset] = {}
+            for window, observations in asset_state['rolling'].items():
+                rolling = RollingCorrelation(int(window))
+                for x, y in observations:
+                    rolling.add(x, y)
+                tracker.rolling[asset][int(window)] = rolling
+        return tracker
+
+def main():
+    """メイン関数: 新しい行だけで相関を更新し、ローリング相関の時系列に追記"""
+    input_file = "data_with_sentiment_scores_correct.csv"
+
+    print("=== オンライン・ローリング相関の更新 ===")
+    print(f"入力ファイル: {input_file}")
+
+    try:
+        if os.path.exists(STREAMING_STATE_PATH):
+            tracker = StreamingCorrelationTracker.load()
+            print(f"保存済みの状態を読み込みました: {STREAMING_STATE_PATH}")
+        else:
+            tracker = StreamingCorrelationTracker()
+            print("状態ファイルがないため、最初から計算します")
+
+        df = pd.read_csv(input_file)
+        history = tracker.update_from_frame(df)
+        tracker.save()
+        print(f"新しい観測: {len(history)} 件")
+
+        if len(history):
+            write_header = not os.path.exists(ROLLING_HISTORY_PATH)
+            history.to_csv(ROLLING_HISTORY_PATH, mode='a', header=write_header, index=False,
+                           encoding='utf-8-sig' if write_header else 'utf-8')
+            print(f"相関の時系列を追記しました: {ROLLING_HISTORY_PATH}")
+
+        print(f"\n=== 最新の相関（{tracker.feature} vs {tracker.target}） ===")
+        for asset, stats in tracker.cumulative.items():
+            windows = ", ".join(
+                f"{w}件: {r.pearson():.4f}" if r.is_full() else f"{w}件: -"
+                for w, r in tracker.rolling[asset].items()
+            )
+            print(f"  {asset}: 累積 {stats.correlation():.4f} (n = {stats.n}) / ローリング {windows}")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
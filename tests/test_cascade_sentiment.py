@@ -0,0 +1,49 @@
+import numpy as np
+
+from cascade_sentiment import CascadeSentimentAnalyzer, LexiconScorer
+
+class _FixedAnalyzer:
+    """BERTの代わりに、送られたタイトルを記録して固定の確率を返す分析器"""
+
+    def __init__(self, probabilities=(0.2, 0.1, 0.7)):
+        self.probabilities = probabilities
+        self.seen = []
+
+    def predict_probabilities(self, texts, batch_size=32):
+        self.seen.extend(texts)
+        return np.tile(np.array(self.probabilities, dtype=np.float32), (len(texts), 1))
+
+def test_ambiguous_keywords_are_not_counted():
+    lexicon = LexiconScorer()
+    for text in ["小売り売上高", "売り上げ見通し", "円売りが加速", "株式の売り出し"]:
+        assert lexicon.score(text) == (0.0, 0), text
+
+def test_selling_still_counts_on_its_own():
+    assert LexiconScorer().score("売りが優勢") == (-0.5, 1)
+
+def test_longer_word_is_counted_once():
+    # 「最高値」の中の「高値」は数えない
+    assert LexiconScorer().matches("日経平均が最高値") == [("最高値", 1)]
+
+def test_negation_flips_polarity():
+    assert LexiconScorer().score("景気は回復せず") == (-0.5, 1)
+
+def test_titles_without_hits_are_neutral_and_skip_bert():
+    analyzer = _FixedAnalyzer()
+    cascade = CascadeSentimentAnalyzer(analyzer=analyzer)
+    scores, routed = cascade.get_sentiment_scores(["ドル円は横ばい", "日銀会合の日程"])
+
+    assert np.array_equal(scores, [0.0, 0.0])
+    assert not routed.any()
+    assert analyzer.seen == []
+
+def test_only_titles_near_the_threshold_go_to_bert():
+    analyzer = _FixedAnalyzer()
+    cascade = CascadeSentimentAnalyzer(analyzer=analyzer)
+    titles = ["最高値更新後に急落", "増益で最高値", "急落"]
+    scores, routed = cascade.get_sentiment_scores(titles)
+
+    # 打ち消し合うタイトル（辞書スコア 0）だけがBERTに送られる
+    assert routed.tolist() == [True, False, False]
+    assert analyzer.seen == ["最高値更新後に急落"]
+    np.testing.assert_allclose(scores, [0.6, 2 / 3, -0.5], rtol=1e-6)
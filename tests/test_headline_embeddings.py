@@ -0,0 +1,80 @@
+import json
+import os
+
+import numpy as np
+
+from headline_embeddings import HeadlineIndex
+
+def _write_index(index_dir, n, dimension=16, seed=0):
+    """正規化済みのランダムな埋め込みで索引を作成"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    matrix = np.lib.format.open_memmap(
+        os.path.join(index_dir, "embeddings.npy"), mode="w+", dtype=np.float16, shape=vectors.shape
+    )
+    matrix[:] = vectors
+    matrix.flush()
+    del matrix
+    with open(os.path.join(index_dir, "titles.json"), "w", encoding="utf-8") as f:
+        json.dump([f"title {i}" for i in range(n)], f)
+    return vectors
+
+def test_search_approximate_pads_small_clusters(tmp_path):
+    vectors = _write_index(str(tmp_path), 100)
+    index = HeadlineIndex(str(tmp_path))
+    # 10個のクラスタのうち1個だけを探索すると、候補が k 件に満たないクエリがある
+    index.build_ivf(n_lists=10)
+    ids, scores = index.search_approximate(vectors[:20], k=10, n_probe=1)
+
+    assert ids.shape == (20, 10)
+    assert scores.shape == (20, 10)
+    cluster_sizes = np.diff(index.ivf_offsets)
+    assert (ids == -1).any() or cluster_sizes.min() >= 10
+    padded = ids == -1
+    assert np.all(np.isneginf(scores[padded]))
+    assert np.all(np.isfinite(scores[~padded]))
+    # 各クエリ自身は同じクラスタにあるので先頭に来る
+    assert np.array_equal(ids[:, 0], np.arange(20))
+
+def test_search_approximate_handles_empty_clusters(tmp_path):
+    vectors = _write_index(str(tmp_path), 30)
+    index = HeadlineIndex(str(tmp_path))
+    index.build_ivf(n_lists=3)
+    # 空のクラスタだけを探索させる
+    index.ivf_offsets = np.array([0, 0, 0, 30])
+    index.centroids = np.eye(3, vectors.shape[1], dtype=np.float32)
+    queries = np.eye(1, vectors.shape[1], dtype=np.float32)
+    ids, scores = index.search_approximate(queries, k=5, n_probe=1)
+
+    assert np.array_equal(ids, np.full((1, 5), -1))
+    assert np.all(np.isneginf(scores))
+
+def test_in_memory_and_block_paths_match(tmp_path):
+    vectors = _write_index(str(tmp_path), 500, dimension=32)
+    in_memory = HeadlineIndex(str(tmp_path), in_memory=True)
+    on_disk = HeadlineIndex(str(tmp_path))
+    assert in_memory.vectors is not None
+    assert on_disk.vectors is None
+
+    # 同じクエリに対して、類似度と順位が一致する
+    queries = vectors[:20] + 0.1 * np.random.default_rng(1).standard_normal((20, 32)).astype(np.float32)
+    ids, scores = in_memory.search(queries, k=10)
+    block_ids, block_scores = on_disk.search(queries, k=10, block_size=64)
+    assert np.array_equal(ids, block_ids)
+    np.testing.assert_allclose(scores, block_scores, rtol=1e-6, atol=1e-6)
+
+    on_disk.build_ivf(n_lists=8)
+    in_memory._load_ivf()
+    approx_ids, approx_scores = in_memory.search_approximate(queries, k=10, n_probe=2)
+    block_approx_ids, block_approx_scores = on_disk.search_approximate(queries, k=10, n_probe=2)
+    assert np.array_equal(approx_ids, block_approx_ids)
+    np.testing.assert_allclose(approx_scores, block_approx_scores, rtol=1e-6, atol=1e-6)
+
+def test_search_pads_when_index_is_smaller_than_k(tmp_path):
+    vectors = _write_index(str(tmp_path), 50)
+    for index in (HeadlineIndex(str(tmp_path), in_memory=True), HeadlineIndex(str(tmp_path))):
+        ids, scores = index.search(vectors[:5], k=60, block_size=16)
+        assert ids.shape == scores.shape == (5, 60)
+        assert np.array_equal(ids[:, 50:], np.full((5, 10), -1))
+        assert np.all(np.isneginf(scores[:, 50:]))
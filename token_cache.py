@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from typing import List, Dict
+
+import numpy as np
+import torch
+
+# トークンキャッシュの保存先
+TOKEN_CACHE_DIR = "token_cache"
+
+def normalize_headline(text: str) -> str:
+    """キャッシュのキーとなるヘッドラインの正規化（空白の整理のみ）"""
+    return re.sub(r'\s+', ' ', str(text)).strip()
+
+def tokenizer_identity(tokenizer) -> str:
+    """トークナイザーの設定と語彙から識別子を作成"""
+    vocab = sorted(tokenizer.get_vocab().items(), key=lambda item: item[1])
+    digest = hashlib.sha1()
+    digest.update(type(tokenizer).__name__.encode("utf-8"))
+    digest.update(str(getattr(tokenizer, "name_or_path", "")).encode("utf-8"))
+    digest.update(str(tokenizer.model_max_length).encode("utf-8"))
+    for option in ("do_lower_case", "word_tokenizer_type", "subword_tokenizer_type"):
+        digest.update(f"{option}={getattr(tokenizer, option, None)}".encode("utf-8"))
+    digest.update("\n".join(token for token, _ in vocab).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+class TokenCache:
+    def __init__(self, tokenizer, cache_dir: str = TOKEN_CACHE_DIR, max_length: int = 512):
+        """正規化したヘッドラインごとの input_ids を保存するトークンキャッシュ
+
+        トークン列は1本のint32配列に連結し、各ヘッドラインの開始位置をoffsetsに保存する。
+        どちらも .npy 形式でメモリマップして読み込む。attention_mask はトークン長から復元する。
+
+        Args:
+            tokenizer: トークナイザー（識別子の作成とキャッシュ未登録時のトークン化に使用）
+            cache_dir (str): キャッシュのルートディレクトリ
+            max_length (int): 最大トークン長（切り詰め）
+        """
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.identity = tokenizer_identity(tokenizer)
+        self.directory = os.path.join(cache_dir, f"{self.identity}_{max_length}")
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        """キャッシュをメモリマップで読み込む"""
+        if os.path.exists(self._path("keys.json")):
+            with open(self._path("keys.json"), encoding="utf-8") as f:
+                keys = json.load(f)
+            self.input_ids = np.load(self._path("input_ids.npy"), mmap_mode="r")
+            self.offsets = np.load(self._path("offsets.npy"), mmap_mode="r")
+        else:
+            keys = []
+            self.input_ids = np.zeros(0, dtype=np.int32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+        self.index = {key: i for i, key in enumerate(keys)}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize_headline(text) in self.index
+
+    def _tokenize(self, texts: List[str]) -> List[List[int]]:
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        return encoded["input_ids"]
+
+    def add(self, texts: List[str]) -> int:
+        """未登録のヘッドラインをトークン化してキャッシュに追加し、追加件数を返す"""
+        new_keys = list(dict.fromkeys(
+            key for key in (normalize_headline(t) for t in texts) if key and key not in self.index
+        ))
+        if not new_keys:
+            return 0
+
+        sequences = self._tokenize(new_keys)
+        lengths = np.array([len(ids) for ids in sequences], dtype=np.int64)
+        new_ids = np.fromiter((i for ids in sequences for i in ids), dtype=np.int32, count=int(lengths.sum()))
+
+        input_ids = np.concatenate([np.asarray(self.input_ids), new_ids])
+        offsets = np.concatenate([np.asarray(self.offsets), self.offsets[-1] + np.cumsum(lengths)])
+        keys = sorted(self.index, key=self.index.get) + new_keys
+
+        # 一時ファイルに書いてから置き換える
+        os.makedirs(self.directory, exist_ok=True)
+        for name, array in (("input_ids.npy", input_ids), ("offsets.npy", offsets)):
+            np.save(self._path(name + ".tmp.npy"), array)
+            os.replace(self._path(name + ".tmp.npy"), self._path(name))
+        with open(self._path("keys.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(keys, f, ensure_ascii=False)
+        os.replace(self._path("keys.json.tmp"), self._path("keys.json"))
+
+        self._load()
+        return len(new_keys)
+
+    def get_ids(self, text: str) -> np.ndarray:
+        """ヘッドラインの input_ids を返す（未登録ならその場でトークン化）"""
+        row = self.index.get(normalize_headline(text))
+        if row is None:
+            return np.asarray(self._tokenize([normalize_headline(text)])[0], dtype=np.int32)
+        return self.input_ids[self.offsets[row]:self.offsets[row + 1]]
+
+    def encode_batch(self, texts: List[str]) -> Dict[str, torch.Tensor]:
+        """トークナイザーの代わりに、パディング済みのモデル入力を作成"""
+        sequences = [self.get_ids(t) for t in texts]
+        max_len = max((len(ids) for ids in sequences), default=0)
+
+        input_ids = np.full((len(sequences), max_len), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(sequences), max_len), dtype=np.int64)
+        for i, ids in enumerate(sequences):
+            input_ids[i, :len(ids)] = ids
+            attention_mask[i, :len(ids)] = 1
+
+        return {
+            'input_ids': torch.from_numpy(input_ids),
+            'attention_mask': torch.from_numpy(attention_mask),
+            'token_type_ids': torch.zeros_like(torch.from_numpy(input_ids)),
+        }
+
+def main():
+    """メイン関数: ヘッドラインコーパスのトークンキャッシュを作成"""
+    from sentiment_analyzer_correct import CorrectSentimentAnalyzer, load_news_titles
+
+    input_file = "data_with_news_titles.csv"
+    batch_size = 32
+
+    print("=== ヘッドライン トークンキャッシュ作成ツール ===")
+    print(f"入力ファイル: {input_file}")
+
+    try:
+        analyzer = CorrectSentimentAnalyzer()
+        titles = load_news_titles(input_file)
+        print(f"ユニークなタイトル数: {len(titles)}")
+
+        cache = TokenCache(analyzer.tokenizer)
+        print(f"キャッシュ: {cache.directory}（登録済み {len(cache)} 件）")
+        added = cache.add(titles)
+        print(f"新規登録: {added} 件（合計 {len(cache)} 件）")
+
+        # トークン化とキャッシュ読み込みの時間を比較
+        start = time.perf_counter()
+        for i in range(0, len(titles), batch_size):
+            analyzer.tokenizer(titles[i:i + batch_size], return_tensors="pt", truncation=True, padding=True)
+        tokenize_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(0, len(titles), batch_size):
+            cache.encode_batch(titles[i:i + batch_size])
+        cache_time = time.perf_counter() - start
+
+        print(f"\nトークン化:       {tokenize_time:.3f} 秒")
+        print(f"キャッシュ読込:   {cache_time:.3f} 秒 (x{tokenize_time / max(cache_time, 1e-9):.1f})")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
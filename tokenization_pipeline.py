@@ -0,0 +1,183 @@
+import queue
+import sys
+import threading
+import time
+from typing import List, Dict, Any
+
+import torch
+
+from sentiment_analyzer_correct import CorrectSentimentAnalyzer, load_news_titles
+
+# 生産者の終了を示す番兵
+_END_OF_BATCHES = object()
+# キューが満杯のとき、停止要求を確認する間隔（秒）
+_PUT_TIMEOUT = 0.1
+
+def _put_unless_stopped(batches: queue.Queue, item, stop: threading.Event) -> bool:
+    """キューに空きができるまで待って積む。stop が立った場合は積まずに False を返す"""
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+class TokenizationPipeline:
+    def __init__(self, analyzer: CorrectSentimentAnalyzer, batch_size: int = 32,
+                 prefetch_batches: int = 4, sort_by_length: bool = True, token_cache=None):
+        """トークン化と推論を重ねて実行するパイプライン
+
+        トークン化（MeCabによる単語分割を含む）は別スレッドで先行して実行し、
+        パディング済みのバッチを上限付きキューに積む。推論側はキューから取り出して順伝播する。
+
+        Args:
+            analyzer (CorrectSentimentAnalyzer): 読み込み済みの分析器
+            batch_size (int): バッチサイズ
+            prefetch_batches (int): 先行してトークン化しておくバッチ数の上限
+            sort_by_length (bool): 文字数順に並べてパディングを減らす（出力は入力順に戻す）
+            token_cache (TokenCache): 指定した場合はトークナイザーの代わりにキャッシュから入力を作成
+        """
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+        self.prefetch_batches = prefetch_batches
+        self.sort_by_length = sort_by_length
+        self.token_cache = token_cache
+        self.last_timings = {}
+
+    def _produce(self, texts: List[str], order: List[int], batch_size: int, batches: queue.Queue,
+                 timings: Dict[str, float], stop: threading.Event):
+        """トークン化ステージ: パディング済みバッチをキューに積む（stop が立ったら終了する）"""
+        try:
+            for start in range(0, len(order), batch_size):
+                if stop.is_set():
+                    return
+                indices = order[start:start + batch_size]
+                began = time.perf_counter()
+                batch = [texts[i] for i in indices]
+                if self.token_cache is not None:
+                    inputs = self.token_cache.encode_batch(batch)
+                else:
+                    inputs = self.analyzer.tokenizer(batch, return_tensors="pt", truncation=True, padding=True)
+                timings['tokenize'] += time.perf_counter() - began
+                if not _put_unless_stopped(batches, (indices, inputs), stop):
+                    return
+        except Exception as e:
+            _put_unless_stopped(batches, e, stop)
+        finally:
+            _put_unless_stopped(batches, _END_OF_BATCHES, stop)
+
+    def predict_probabilities(self, texts: List[str], batch_size: int = None) -> torch.Tensor:
+        """分析器と同じAPIで [中立, ネガティブ, ポジティブ] の確率を返す
+
+        batch_size を指定しない場合はコンストラクタで指定したバッチサイズを使う。
+        """
+        if not texts:
+            return torch.zeros((0, 3))
+
+        order = list(range(len(texts)))
+        if self.sort_by_length:
+            order.sort(key=lambda i: len(texts[i]))
+
+        timings = {'tokenize': 0.0, 'forward': 0.0, 'wait': 0.0}
+        batches = queue.Queue(maxsize=self.prefetch_batches)
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._produce, args=(texts, order, batch_size or self.batch_size, batches, timings, stop),
+            daemon=True
+        )
+
+        wall_start = time.perf_counter()
+        producer.start()
+
+        probs = torch.zeros((len(texts), 3))
+        try:
+            while True:
+                began = time.perf_counter()
+                item = batches.get()
+                timings['wait'] += time.perf_counter() - began
+
+                if item is _END_OF_BATCHES:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                indices, inputs = item
+                began = time.perf_counter()
+                logits = self.analyzer.compute_logits(inputs)
+                timings['forward'] += time.perf_counter() - began
+                probs[indices] = torch.softmax(logits, dim=1)
+        finally:
+            # 推論側で例外が出た場合も、キューが満杯で待っている生産者を終了させる
+            stop.set()
+            producer.join()
+        timings['wall'] = time.perf_counter() - wall_start
+        timings['titles'] = len(texts)
+        self.last_timings = timings
+        return probs
+
+    def print_timings(self):
+        """直近の実行の時間内訳を表示"""
+        t = self.last_timings
+        if not t:
+            print("まだ実行されていません。")
+            return
+        print(f"  総時間:       {t['wall']:.2f} 秒 ({t['titles'] / t['wall']:.1f} 件/秒)")
+        print(f"  トークン化:   {t['tokenize']:.2f} 秒 ({t['tokenize'] / t['wall'] * 100:.0f}%)")
+        print(f"  順伝播:       {t['forward']:.2f} 秒 ({t['forward'] / t['wall'] * 100:.0f}%)")
+        print(f"  バッチ待ち:   {t['wait']:.2f} 秒（トークン化が律速している時間）")
+
+def measure_inline(analyzer: CorrectSentimentAnalyzer, texts: List[str], batch_size: int = 32) -> Dict[str, float]:
+    """トークン化と順伝播を交互に実行する従来方式の時間内訳を計測"""
+    timings = {'tokenize': 0.0, 'forward': 0.0}
+    wall_start = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        began = time.perf_counter()
+        inputs = analyzer.tokenizer(texts[start:start + batch_size], return_tensors="pt", truncation=True, padding=True)
+        timings['tokenize'] += time.perf_counter() - began
+
+        began = time.perf_counter()
+        analyzer.compute_logits(inputs)
+        timings['forward'] += time.perf_counter() - began
+    timings['wall'] = time.perf_counter() - wall_start
+    return timings
+
+def main():
+    """メイン関数: 逐次実行とパイプライン実行の時間内訳を比較"""
+    input_file = "data_with_news_titles.csv"
+    batch_size = 32
+
+    print("=== トークン化・推論オーバーラップパイプライン ===")
+    print(f"入力ファイル: {input_file}")
+
+    try:
+        analyzer = CorrectSentimentAnalyzer()
+        titles = load_news_titles(input_file)
+        print(f"ユニークなタイトル数: {len(titles)}")
+
+        # ウォームアップ
+        analyzer.predict_probabilities(titles[:batch_size], batch_size)
+
+        print("\n--- 逐次実行（トークン化 → 順伝播）---")
+        inline = measure_inline(analyzer, titles, batch_size)
+        print(f"  総時間:       {inline['wall']:.2f} 秒 ({len(titles) / inline['wall']:.1f} 件/秒)")
+        print(f"  トークン化:   {inline['tokenize']:.2f} 秒 ({inline['tokenize'] / inline['wall'] * 100:.0f}%)")
+        print(f"  順伝播:       {inline['forward']:.2f} 秒 ({inline['forward'] / inline['wall'] * 100:.0f}%)")
+
+        print("\n--- パイプライン実行 ---")
+        pipeline = TokenizationPipeline(analyzer, batch_size=batch_size)
+        pipeline.predict_probabilities(titles)
+        pipeline.print_timings()
+
+        speedup = inline['wall'] / pipeline.last_timings['wall']
+        faster = "パイプライン" if speedup > 1.0 else "逐次実行"
+        print(f"\n速度比: {speedup:.2f} 倍 → この環境では {faster} が高速です")
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any
+
+from asset_router import AssetRouter
+
+JST = timezone(timedelta(hours=9))
+
+# 市場セッション（JSTの時刻、開始時・終了時）と重み: 東京の寄り付き前～大引け、米国市場の取引時間
+MARKET_SESSIONS = [
+    ((6, 0), (9, 0), 0.75),    # 東京の寄り付き前（米国市場の結果を受けた記事）
+    ((9, 0), (15, 30), 1.0),   # 東京市場
+    ((22, 30), (24, 0), 1.0),  # 米国市場（前半）
+    ((0, 0), (6, 0), 1.0),     # 米国市場（後半）
+]
+
+def parse_lastmod(text) -> datetime:
+    """サイトマップの lastmod（ISO 8601）をJSTのdatetimeに変換（時刻がない・解析できなければ None）"""
+    if not text or 'T' not in str(text):
+        return None
+    try:
+        value = datetime.fromisoformat(str(text).strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=JST)
+    return value.astimezone(JST)
+
+def session_weight(published: datetime) -> float:
+    """公開時刻が市場セッション中（またはその直前）かどうかの重み"""
+    if published is None:
+        return 0.0
+    minutes = published.hour * 60 + published.minute
+    for (start_h, start_m), (end_h, end_m), weight in MARKET_SESSIONS:
+        if start_h * 60 + start_m <= minutes < end_h * 60 + end_m:
+            return weight
+    return 0.25
+
+def sitemap_candidate(url_tag) -> Dict[str, Any]:
+    """サイトマップの <url> 要素から、URL・更新時刻・タイトル・キーワードを取り出す"""
+    def text_of(name):
+        tag = url_tag.find(name)
+        return tag.text.strip() if tag else ""
+
+    return {
+        'url': text_of('loc'),
+        'lastmod': text_of('lastmod'),
+        'title': text_of('title'),        # news:title
+        'keywords': text_of('keywords'),  # news:keywords
+    }
+
+class UrlRanker:
+    def __init__(self, router: AssetRouter = None, asset_weight: float = 2.0,
+                 keyword_weight: float = 1.0, time_weight: float = 1.0):
+        """取得前に分かるメタデータだけで候補URLの市場関連度を計算
+
+        Args:
+            router (AssetRouter): 資産キーワードのオートマトン（asset_router.py）
+            asset_weight (float): タイトルに関連資産が見つかった場合の重み（資産1つあたり）
+            keyword_weight (float): サイトマップのキーワードに関連資産が見つかった場合の重み
+            time_weight (float): 公開時刻が市場セッションに近い場合の重み
+        """
+        self.router = router or AssetRouter()
+        self.asset_weight = asset_weight
+        self.keyword_weight = keyword_weight
+        self.time_weight = time_weight
+
+    def score(self, candidate: Dict[str, Any]) -> float:
+        title_assets = self.router.tag(candidate.get('title', ''))
+        keyword_assets = self.router.tag(candidate.get('keywords', ''))
+        published = parse_lastmod(candidate.get('lastmod'))
+        return (self.asset_weight * len(title_assets)
+                + self.keyword_weight * len(keyword_assets)
+                + self.time_weight * session_weight(published))
+
+    def select(self, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """関連度の高い順に上位 top_k 件を返す（同点はサイトマップの順序を保つ）"""
+        scored = [dict(candidate, relevance_score=self.score(candidate)) for candidate in candidates]
+        return sorted(scored, key=lambda c: -c['relevance_score'])[:top_k]
@@ -9,6 +9,7 @@ import os
 # textフォルダのscraper_templateをインポート
 sys.path.append('text')
 from scraper_template import fetch_bloomberg_article, parse_article
+from news_dataset import build_news_dataset, NewsDataset
 
 # HTTPリクエスト時のヘッダー
 HEADERS = {
@@ -171,6 +172,9 @@ def process_urls_to_articles(input_csv_path, output_csv_path, max_articles_per_d
     # 各日付について記事を取得
     for date_str, group in date_groups:
         print(f"\n--- 日付: {date_str} ---")
+        # 関連度（csv_url_extractor.py が出力）があれば高い順に並べる（同点は元の順序）
+        if 'relevance_score' in group.columns:
+            group = group.sort_values('relevance_score', ascending=False, kind='stable')
         urls = group['bloomberg_url'].tolist()
         
         # 最大記事数に制限
@@ -246,24 +250,13 @@ def add_titles_to_original_csv(original_csv_path, articles_csv_path, output_csv_
         original_df = pd.read_csv(original_csv_path)
         print(f"元のCSVを読み込みました: {len(original_df)} 行")
         
-        # 記事データのCSVを読み込み
-        articles_df = pd.read_csv(articles_csv_path)
-        print(f"記事データを読み込みました: {len(articles_df)} 行")
+        # 記事表・日付↔記事の対応表に正規化し、結合でタイトルを付与（news_dataset.py）
+        build_news_dataset(original_csv_path, articles_csv_path)
+        dataset = NewsDataset()
+        print(f"記事データを読み込みました: {len(dataset.articles)} 件（日付↔記事: {len(dataset.date_articles)} 件）")
         
-        # 日付ごとに記事タイトルを結合
-        date_titles = {}
-        for _, row in articles_df.iterrows():
-            date = row['date']
-            title = row['title']
-            
-            if date not in date_titles:
-                date_titles[date] = []
-            date_titles[date].append(title)
-        
-        # 元のCSVにニュースタイトル列を追加
-        original_df['news_titles'] = original_df['date'].map(
-            lambda x: ' | '.join(date_titles.get(x, ['記事なし']))
-        )
+        # 元のCSVにニュースタイトル列を追加（旧形式の ' | ' 結合文字列）
+        original_df['news_titles'] = dataset.news_titles().to_numpy()
         
         # 結果を保存
         original_df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')